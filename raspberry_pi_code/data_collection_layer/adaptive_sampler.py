@@ -0,0 +1,82 @@
+# raspberry_pi_code/data_collection_layer/adaptive_sampler.py
+
+import time
+from typing import Optional
+
+
+class AdaptiveSampler:
+    """
+    Chooses the time until the next collection cycle from how fast the weight changes.
+
+    A weight change faster than rate_threshold (kg per minute), or a jump of
+    at least event_threshold kg, switches to fast_interval so swarms and
+    inspections are captured at seconds resolution. Fast sampling is held for
+    hold_time seconds after the last event. While the hive is stable the
+    interval grows by backoff per quiet cycle, from base_interval up to
+    max_interval, which cuts bus time, wakeups and uploads.
+    """
+
+    def __init__(self, base_interval: float = 60.0, fast_interval: float = 5.0,
+                 max_interval: float = 300.0, rate_threshold: float = 0.2,
+                 event_threshold: float = 2.0, min_change: float = 0.1,
+                 hold_time: float = 300.0, backoff: float = 1.5):
+        """
+        Args:
+            base_interval: Interval in seconds after fast mode ends
+            fast_interval: Interval in seconds while the weight is changing
+            max_interval: Longest interval in seconds on a stable hive
+            rate_threshold: Rate of change in kg/min that counts as an event
+            event_threshold: Change in kg between two readings that always counts as an event
+            min_change: Changes below this many kg are treated as noise
+            hold_time: Seconds fast mode is kept after the last event
+            backoff: Factor the interval grows by per quiet cycle
+        """
+        self.base_interval = base_interval
+        self.fast_interval = fast_interval
+        self.max_interval = max_interval
+        self.rate_threshold = rate_threshold
+        self.event_threshold = event_threshold
+        self.min_change = min_change
+        self.hold_time = hold_time
+        self.backoff = backoff
+
+        self.interval = base_interval
+        self.last_weight: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.last_event_time: Optional[float] = None
+
+    @property
+    def fast_mode(self) -> bool:
+        """True while fast sampling is held after an event."""
+        return (self.last_event_time is not None
+                and time.monotonic() - self.last_event_time < self.hold_time)
+
+    def update(self, weight: Optional[float]) -> float:
+        """
+        Feed the weight of the current cycle and return the next interval in seconds.
+        A missing reading keeps the current interval.
+        """
+        now = time.monotonic()
+        if weight is None:
+            return self.interval
+
+        event = False
+        if self.last_weight is not None:
+            change = abs(weight - self.last_weight)
+            minutes = max(now - self.last_time, 1e-3) / 60
+            event = change >= self.event_threshold or (
+                change >= self.min_change and change / minutes >= self.rate_threshold)
+
+        self.last_weight = weight
+        self.last_time = now
+
+        if event:
+            self.last_event_time = now
+            self.interval = self.fast_interval
+        elif self.fast_mode:
+            self.interval = self.fast_interval
+        elif self.interval < self.base_interval:
+            self.interval = self.base_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
@@ -1,69 +1,576 @@
 # raspberry_pi_code/data_collection_layer/data_collector.py
 
+import os
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Optional, Dict, Any, Callable, List, Set, Tuple
 from datetime import datetime
+from BUZZWatch.raspberry_pi_code.hardware_layer import sensors
 from BUZZWatch.raspberry_pi_code.hardware_layer.sensors import (
     read_dht22_indoor,
     read_dht22_outdoor,
     read_weight,
     read_weight_for_thingspeak
 )
-from BUZZWatch.raspberry_pi_code.services.api.thingspeak import ThingSpeakAPI
+from BUZZWatch.raspberry_pi_code.data_collection_layer.temperature_compensation import (
+    TemperatureCompensator,
+    COMPENSATION_FILE
+)
+from BUZZWatch.raspberry_pi_code.data_collection_layer.adaptive_sampler import AdaptiveSampler
+from BUZZWatch.raspberry_pi_code.data_collection_layer.history import HistoryStore
+from BUZZWatch.raspberry_pi_code.data_collection_layer.scheduler import SensorSchedule
+from BUZZWatch.raspberry_pi_code.services.api.thingspeak import (
+    ThingSpeakAPI,
+    CONNECT_TIMEOUT,
+    READ_TIMEOUT,
+    BULK_MAX_ENTRIES
+)
+from BUZZWatch.raspberry_pi_code.services.api.deadband import DeadbandFilter, DEADBAND_HEARTBEAT
+from BUZZWatch.raspberry_pi_code.services.api.rate_limit import ReadingCoalescer
+from BUZZWatch.raspberry_pi_code.services.async_uploader import AsyncUploader
+from BUZZWatch.raspberry_pi_code.services.upload_queue import (
+    UploadQueue,
+    UploadDrainer,
+    UploadTarget,
+    UploadRejected,
+    QueuedReading
+)
+from BUZZWatch.raspberry_pi_code.services.sinks.base import Sink
+from BUZZWatch.raspberry_pi_code.services.sinks.fanout import SinkFanOut
+from BUZZWatch.raspberry_pi_code.services.sinks.thingspeak_sink import ThingSpeakSink
 from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
 
+# Value reported for a sensor whose read failed or missed its deadline
+SENSOR_DEFAULTS = {
+    'indoor': (None, None),
+    'outdoor': (None, None),
+    'weight': None,
+}
+
+# Sensor readers, called with the hive name
+SENSOR_READERS = {
+    'indoor': read_dht22_indoor,
+    'outdoor': read_dht22_outdoor,
+    'weight': lambda hive: read_weight(hive=hive),
+}
+
+# Upper bound for the shared sensor worker pool
+MAX_SENSOR_WORKERS = 32
+
+
+class HiveChannel:
+    """Per-hive processing state: output channel, drift compensation, sampler and last values."""
+
+    def __init__(self, name: str, thingspeak: ThingSpeakAPI,
+                 compensator: Optional[TemperatureCompensator] = None,
+                 sampler: Optional[AdaptiveSampler] = None,
+                 coalesce: str = 'latest'):
+        self.name = name
+        self.thingspeak = thingspeak
+        self.compensator = compensator
+        self.sampler = sampler
+        self.last_weight: Optional[float] = None
+        self.last_upload_time: Optional[float] = None
+        # Readings merged until the next one may be queued (queue without bulk uploads)
+        self.coalescer = ReadingCoalescer(coalesce)
+
+
 class DataCollector:
-    def __init__(self, thingspeak_api_key: str):
-        """Initialize the data collector with ThingSpeak API key."""
-        self.thingspeak = ThingSpeakAPI(thingspeak_api_key)
-        self.last_weight = None
+    def __init__(self, thingspeak_api_key: str,
+                 parallel: bool = True,
+                 sensor_timeout: float = 5.0,
+                 sensor_timeouts: Optional[Dict[str, float]] = None,
+                 max_workers: Optional[int] = None,
+                 temperature_compensation: bool = True,
+                 collection_interval: float = 60.0,
+                 adaptive_sampling: bool = False,
+                 fast_interval: float = 5.0,
+                 max_interval: float = 300.0,
+                 min_upload_interval: float = 15.0,
+                 hives: Optional[List[str]] = None,
+                 http_timeouts: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+                 upload_queue: Optional[UploadQueue] = None,
+                 thingspeak_channel_id: Optional[str] = None,
+                 upload_batch_interval: float = 0.0,
+                 upload_coalesce: str = 'latest',
+                 async_upload: bool = False,
+                 upload_workers: int = 2,
+                 upload_timeout: float = 30.0,
+                 sinks: Optional[List[Sink]] = None,
+                 upload_deadband: Optional[Dict[str, float]] = None,
+                 upload_heartbeat: float = DEADBAND_HEARTBEAT,
+                 history: Optional[HistoryStore] = None,
+                 sensor_intervals: Optional[Dict[str, float]] = None,
+                 sensor_phases: Optional[Dict[str, float]] = None):
+        """
+        Initialize the data collector with ThingSpeak API key.
+
+        Args:
+            thingspeak_api_key: ThingSpeak Write API Key of a single hive without its
+                own 'thingspeak_api_key' (with several hives, each needs its own)
+            parallel: If True, all sensors are read at the same time on a worker pool
+            sensor_timeout: Default deadline in seconds for a single sensor read
+            sensor_timeouts: Optional per-sensor deadlines ('indoor', 'outdoor', 'weight')
+            max_workers: Size of the sensor worker pool shared by all hives
+                (default: three per hive, at most MAX_SENSOR_WORKERS)
+            temperature_compensation: If True, weight is corrected for the load cell
+                temperature drift fitted against the outdoor temperature
+            collection_interval: Fixed interval between cycles in seconds (base interval
+                when adaptive sampling is on)
+            adaptive_sampling: If True, the interval follows how fast the weight changes
+            fast_interval: Adaptive interval in seconds while the weight is changing
+            max_interval: Longest adaptive interval in seconds on a stable hive
+            min_upload_interval: Minimum seconds between two updates of a ThingSpeak
+                channel (its rate limit); faster readings are merged, see upload_coalesce
+            hives: Names of the hives to collect (default: all configured hives,
+                see sensors.configure_hives())
+            http_timeouts: (connect, read) timeouts in seconds for ThingSpeak requests
+            upload_queue: If given, readings are stored in this durable queue and
+                uploaded by a background thread (store-and-forward) instead of
+                being uploaded, and lost on failure, inside the collection cycle
+            thingspeak_channel_id: Channel ID belonging to thingspeak_api_key; enables
+                bulk uploads of the queue (hives set their own 'thingspeak_channel_id')
+            upload_batch_interval: With a queue and bulk uploads, readings are collected
+                for up to this many seconds and sent in one request (0 = send right away)
+            upload_coalesce: How readings arriving faster than min_upload_interval are
+                merged into one upload: 'latest' or 'mean'
+            async_upload: If True (and no upload_queue is given), uploads are handed to
+                an asyncio uploader and the collection cycle never waits for the network
+            upload_workers: Concurrent async upload workers
+            upload_timeout: Seconds a single async upload may take
+            sinks: Additional outputs (MQTT, local file, ...) every reading is sent to,
+                concurrently with ThingSpeak
+            upload_deadband: Per-field change (e.g. {'outdoor_temp': 0.2, 'weight': 0.05})
+                below which a field is not sent to ThingSpeak; readings without any such
+                change are skipped. None sends every field of every reading
+            upload_heartbeat: With upload_deadband, most seconds a field goes unsent
+            history: If given, every reading is also stored in this local history
+            sensor_intervals: Own read period in seconds per sensor ('indoor', 'outdoor',
+                'weight'), e.g. {'outdoor': 300}; sensors without one are read every
+                cycle. Readings are assembled from the latest value of each sensor
+            sensor_phases: Seconds after the period boundary a sensor is read at,
+                e.g. {'outdoor': 30} to keep slow sensors out of the same cycle
+        """
         self.WEIGHT_DROP_THRESHOLD = 2.0
-        
+        self.hives = list(hives) if hives else list(sensors.hives)
+
+        self.parallel = parallel
+        self.sensor_timeout = sensor_timeout
+        self.sensor_timeouts = sensor_timeouts or {}
+        self.read_latencies: Dict[str, Optional[float]] = {}
+        self.last_cycle_time: Optional[float] = None
+        self.last_acquired_at: Optional[float] = None
+
+        self.collection_interval = collection_interval
+        self.min_upload_interval = min_upload_interval
+
+        self.channels: Dict[str, HiveChannel] = {}
+        used_keys: Dict[str, str] = {}
+        for index, hive in enumerate(self.hives):
+            definition = sensors.get_hive(hive)
+            compensator = None
+            if temperature_compensation:
+                # The first hive keeps the single-hive state file
+                state_file = COMPENSATION_FILE if index == 0 else os.path.join(
+                    os.path.dirname(COMPENSATION_FILE), f"temperature_compensation_{hive}.json")
+                compensator = TemperatureCompensator(state_file=state_file)
+            sampler = AdaptiveSampler(
+                base_interval=collection_interval,
+                fast_interval=fast_interval,
+                max_interval=max_interval,
+                event_threshold=self.WEIGHT_DROP_THRESHOLD
+            ) if adaptive_sampling else None
+            if definition.get('thingspeak_api_key'):
+                api_key, channel_id = definition['thingspeak_api_key'], definition.get('thingspeak_channel_id')
+            elif len(self.hives) > 1:
+                # Hives sharing a channel would overwrite each other's fields and
+                # share its rate limit, so only a single hive may use the global key
+                raise ValueError(f"Hive {hive} has no 'thingspeak_api_key'; with several hives "
+                                 f"each hive needs its own ThingSpeak channel")
+            else:
+                api_key, channel_id = thingspeak_api_key, thingspeak_channel_id
+            if api_key in used_keys:
+                raise ValueError(f"Hives {used_keys[api_key]} and {hive} use the same ThingSpeak channel")
+            used_keys[api_key] = hive
+            deadband = DeadbandFilter(upload_deadband, upload_heartbeat) if upload_deadband else None
+            api = ThingSpeakAPI(api_key, *http_timeouts, channel_id=channel_id,
+                                update_interval=min_upload_interval, coalesce=upload_coalesce,
+                                deadband=deadband)
+            self.channels[hive] = HiveChannel(hive, api, compensator, sampler, upload_coalesce)
+
+        # One reader per hive and sensor; latencies are reported as "hive/sensor"
+        self._readers: Dict[Tuple[str, str], Callable[[], Any]] = {
+            (hive, name): (lambda reader=reader, hive=hive: reader(hive))
+            for hive in self.hives
+            for name, reader in SENSOR_READERS.items()
+        }
+        if max_workers is None:
+            max_workers = min(MAX_SENSOR_WORKERS, len(self._readers))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                            thread_name_prefix="sensor") if parallel else None
+        self._pending: Dict[Tuple[str, str], Future] = {}
+
+        # Sensors with their own period are read when due, the others every cycle;
+        # each reading takes the latest value of every sensor
+        sensor_intervals = sensor_intervals or {}
+        unknown = (set(sensor_intervals) | set(sensor_phases or {})) - set(SENSOR_READERS)
+        if unknown:
+            raise ValueError(f"Unknown sensors: {', '.join(sorted(unknown))}")
+        self.schedule = SensorSchedule(
+            {(hive, name): period for hive in self.hives for name, period in sensor_intervals.items()},
+            {(hive, name): phase for hive in self.hives for name, phase in (sensor_phases or {}).items()},
+            tolerance=(fast_interval if adaptive_sampling else collection_interval) / 2
+        ) if sensor_intervals else None
+        self.latest: Dict[Tuple[str, str], Any] = {key: SENSOR_DEFAULTS[key[1]] for key in self._readers}
+        self.latest_at: Dict[Tuple[str, str], Optional[float]] = {key: None for key in self._readers}
+        self.fresh: Set[Tuple[str, str]] = set()   # Sensors read successfully in the last cycle
+
+        # ThingSpeak and the extra sinks receive each reading at the same time; with a
+        # queue, ThingSpeak is fed by the drainer and only the extra sinks are sent here
+        self.sinks = list(sinks or [])
+        outputs = [] if upload_queue is not None else [
+            ThingSpeakSink({hive: channel.thingspeak for hive, channel in self.channels.items()})]
+        self.output = SinkFanOut(outputs + self.sinks, timeout=upload_timeout)
+
+        self.history = history
+
+        self.upload_queue = upload_queue
+        self.drainer = None
+        if upload_queue is not None:
+            targets = {}
+            for hive, channel in self.channels.items():
+                if channel.thingspeak.supports_bulk:
+                    targets[hive] = UploadTarget(self._send_queued, BULK_MAX_ENTRIES, upload_batch_interval)
+                else:
+                    targets[hive] = UploadTarget(self._send_queued, 1, 0.0)
+            self.drainer = UploadDrainer(upload_queue, targets, min_interval=min_upload_interval)
+            self.drainer.start()
+
+        self.uploader = None
+        if async_upload and upload_queue is None:
+            self.uploader = AsyncUploader(self._send_async, workers=upload_workers, timeout=upload_timeout)
+            self.uploader.start()
+
+    # Single-hive attributes, kept for callers written before multi-hive support
+    @property
+    def thingspeak(self) -> ThingSpeakAPI:
+        return self.channels[self.hives[0]].thingspeak
+
+    @property
+    def compensator(self) -> Optional[TemperatureCompensator]:
+        return self.channels[self.hives[0]].compensator
+
+    @property
+    def sampler(self) -> Optional[AdaptiveSampler]:
+        return self.channels[self.hives[0]].sampler
+
+    @property
+    def last_weight(self) -> Optional[float]:
+        return self.channels[self.hives[0]].last_weight
+
+    def _label(self, key: Tuple[str, str]) -> str:
+        hive, name = key
+        return f"{hive}/{name}" if len(self.hives) > 1 else name
+
+    def _timed_read(self, key: Tuple[str, str]):
+        """Run one sensor reader and return (value, elapsed seconds)."""
+        start = time.monotonic()
+        value = self._readers[key]()
+        return value, time.monotonic() - start
+
+    def _read_sequential(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+        """Read the sensors one after another (legacy mode)."""
+        results = {}
+        for key in keys:
+            label = self._label(key)
+            try:
+                results[key], self.read_latencies[label] = self._timed_read(key)
+            except Exception as e:
+                log_error_to_file("ERR_SENSOR_READ", f"{label}: {str(e)}")
+                results[key] = SENSOR_DEFAULTS[key[1]]
+                self.read_latencies[label] = None
+        return results
+
+    def _read_parallel(self, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+        """
+        Start all sensor reads of all hives at once and gather them, each against
+        its own deadline. A read that is still running from a previous cycle is not
+        started again, so a hung sensor can occupy at most one worker.
+        """
+        start = time.monotonic()
+        futures = {}
+        for key in keys:
+            previous = self._pending.get(key)
+            if previous is not None and not previous.done():
+                log_error_to_file("ERR_SENSOR_TIMEOUT", f"{self._label(key)}: previous read still running, skipped")
+                continue
+            futures[key] = self._executor.submit(self._timed_read, key)
+            self._pending[key] = futures[key]
+
+        results = {}
+        for key in keys:
+            label = self._label(key)
+            results[key] = SENSOR_DEFAULTS[key[1]]
+            self.read_latencies[label] = None
+            future = futures.get(key)
+            if future is None:
+                continue
+
+            deadline = start + self.sensor_timeouts.get(key[1], self.sensor_timeout)
+            try:
+                results[key], self.read_latencies[label] = future.result(
+                    timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                log_error_to_file("ERR_SENSOR_TIMEOUT",
+                                  f"{label}: no reading within {deadline - start:.1f} seconds")
+            except Exception as e:
+                log_error_to_file("ERR_SENSOR_READ", f"{label}: {str(e)}")
+        return results
+
+    def read_sensors(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the sensors of all hives that are due (all of them without
+        sensor_intervals) and assemble the latest value of every sensor.
+
+        Returns:
+            {hive: {'indoor': (temp, humidity), 'outdoor': (temp, humidity), 'weight': kg}}
+
+        Per-sensor latencies of this cycle's reads are stored in self.read_latencies
+        and the total acquisition time in self.last_cycle_time; the sensors read
+        successfully are in self.fresh.
+
+        A scheduled sensor whose read fails is read again in the next cycle. Until
+        then its previous value is kept (with its own time in self.latest_at), as
+        long as it is younger than two periods.
+        """
+        start = time.monotonic()
+        self.last_acquired_at = time.time()
+        keys = list(self._readers)
+        if self.schedule is not None:
+            due = set(self.schedule.due(start))
+            keys = [key for key in keys if key not in self.schedule.periods or key in due]
+        self.read_latencies = {}
+        if self.parallel:
+            results = self._read_parallel(keys)
+        else:
+            results = self._read_sequential(keys)
+        self.last_cycle_time = time.monotonic() - start
+
+        self.fresh = set()
+        for key, value in results.items():
+            if self.read_latencies.get(self._label(key)) is not None and value != SENSOR_DEFAULTS[key[1]]:
+                self.latest[key] = value
+                self.latest_at[key] = self.last_acquired_at
+                self.fresh.add(key)
+            elif self.schedule is not None and key in self.schedule.periods:
+                self.schedule.retry(key)
+                if (self.latest_at[key] is None
+                        or self.last_acquired_at - self.latest_at[key] >= 2 * self.schedule.periods[key]):
+                    self.latest[key] = SENSOR_DEFAULTS[key[1]]
+            else:
+                self.latest[key] = SENSOR_DEFAULTS[key[1]]
+
+        readings = {hive: {} for hive in self.hives}
+        for (hive, name), value in self.latest.items():
+            readings[hive][name] = value
+        return readings
+
     def collect_and_upload_data(self) -> bool:
         """
-        Collect data from all sensors and upload to ThingSpeak.
+        Collect data from all sensors and upload each hive to its ThingSpeak channel.
         Returns True if successful, False if any error occurred.
         """
         try:
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             print(f"\n[{current_time}] Collecting sensor data...")
             
-            # Read indoor DHT22
-            indoor_temp, indoor_humidity = read_dht22_indoor()
-            print(f"Indoor: {indoor_temp}°C, {indoor_humidity}% RH")
+            readings = self.read_sensors()
+            latencies = ", ".join(
+                f"{name} {latency:.2f}s" if latency is not None else f"{name} n/a"
+                for name, latency in self.read_latencies.items()
+            )
+            print(f"Read times: {latencies} (cycle {self.last_cycle_time:.2f}s)")
+            cached = ", ".join(
+                f"{self._label(key)} {self.last_acquired_at - self.latest_at[key]:.0f}s old"
+                for key in self._readers
+                if key not in self.fresh and self.latest_at[key] is not None
+            )
+            if cached:
+                print(f"Latest values: {cached}")
+
+            success = True
+            for hive in self.hives:
+                if len(self.hives) > 1:
+                    print(f"--- {hive} ---")
+                if not self._process_hive(self.channels[hive], readings[hive]):
+                    success = False
+            return success
             
-            # Read outdoor DHT22
-            outdoor_temp, outdoor_humidity = read_dht22_outdoor()
+        except Exception as e:
+            log_error_to_file("ERR_DATA_COLLECTION", str(e))
+            print(f"Error during data collection: {str(e)}")
+            return False
+
+    def _process_hive(self, channel: HiveChannel, readings: Dict[str, Any]) -> bool:
+        """Compensate, check and upload the readings of one hive."""
+        try:
+            indoor_temp, indoor_humidity = readings['indoor']
+            outdoor_temp, outdoor_humidity = readings['outdoor']
+            weight = readings['weight']
+
+            print(f"Indoor: {indoor_temp}°C, {indoor_humidity}% RH")
             print(f"Outdoor: {outdoor_temp}°C, {outdoor_humidity}% RH")
+
+            # The load cells sit outside the hive, so they drift with the outdoor temperature
+            if channel.compensator:
+                # Only pairs read together in this cycle go into the drift fit
+                if {(channel.name, 'weight'), (channel.name, 'outdoor')} <= self.fresh:
+                    channel.compensator.add(weight, outdoor_temp)
+                compensated = channel.compensator.compensate(weight, outdoor_temp)
+                if compensated is not None and compensated != weight:
+                    print(f"Weight: {round(compensated, 2)} (uncompensated {weight})")
+                    weight = round(compensated, 2)
+                else:
+                    print(f"Weight: {weight}")
+            else:
+                print(f"Weight: {weight}")
             
-            # Read weight
-            weight = read_weight()
-            print(f"Weight: {weight}")
+            # Large drops point to a swarm (or an inspection)
+            if (weight is not None and channel.last_weight is not None
+                    and channel.last_weight - weight >= self.WEIGHT_DROP_THRESHOLD):
+                print(f"Weight dropped by {channel.last_weight - weight:.2f} kg since the last reading!")
             
             # Store last weight for future comparison
-            self.last_weight = weight
+            channel.last_weight = weight
+            if channel.sampler:
+                channel.sampler.update(weight)
+            
+            fields = {
+                'indoor_temp': indoor_temp,
+                'indoor_humidity': indoor_humidity,
+                'outdoor_temp': outdoor_temp,
+                'outdoor_humidity': outdoor_humidity,
+                'weight': weight
+            }
+            
+            # Local history first: it is kept even if every upload fails
+            if self.history is not None:
+                self.history.add(channel.name, self.last_acquired_at, fields)
             
-            # Upload to ThingSpeak
+            # Store-and-forward: the drainer thread uploads it when the network allows
+            if self.upload_queue is not None:
+                if self.sinks:
+                    self._report_sinks(self.output.send(channel.name, self.last_acquired_at, fields))
+                # Without bulk uploads every queued reading costs one request, so readings
+                # faster than the channel's update rate are merged into one queued reading
+                queued, created_at = fields, self.last_acquired_at
+                if not channel.thingspeak.supports_bulk:
+                    now = time.monotonic()
+                    channel.coalescer.add(fields, self.last_acquired_at)
+                    if (channel.last_upload_time is not None
+                            and now - channel.last_upload_time < self.min_upload_interval):
+                        print("Merged into the next queued reading (minimum upload interval not reached)")
+                        return True
+                    channel.last_upload_time = now
+                    queued, created_at = channel.coalescer.pop()
+                if all(value is None for value in queued.values()):
+                    # ThingSpeak rejects a reading without any value
+                    print("Nothing to queue (no sensor value in this reading)")
+                    return True
+                self.upload_queue.put(channel.name, created_at, queued)
+                self.drainer.wake()
+                print(f"Queued for upload ({len(self.upload_queue)} waiting)")
+                return True
+            
+            # Async upload: the workers send it, this cycle does not wait for the network
+            if self.uploader is not None:
+                self.uploader.submit(channel.name, self.last_acquired_at, fields)
+                print(f"Handed over for upload ({self.uploader.pending} waiting)")
+                return True
+            
+            # Upload to ThingSpeak; readings faster than the channel's rate limit are
+            # merged into the next upload by the API instead of being rejected
             print("Uploading to ThingSpeak...")
-            success = self.thingspeak.upload_data(
-                indoor_temp=indoor_temp,
-                indoor_humidity=indoor_humidity,
-                outdoor_temp=outdoor_temp,
-                outdoor_humidity=outdoor_humidity,
-                weight=weight
-            )
+            results = self.output.send(channel.name, self.last_acquired_at, fields)
+            self._report_sinks(results)
             
-            if not success:
-                log_error_to_file("ERR_DATA_UPLOAD", "Failed to upload data to ThingSpeak")
+            if not results['thingspeak']:
+                log_error_to_file("ERR_DATA_UPLOAD", f"{channel.name}: Failed to upload data to ThingSpeak")
                 print("Upload failed!")
                 return False
             
-            print("Upload successful!")    
+            if channel.thingspeak.skipped:
+                print("Upload skipped (no value, or no field changed beyond its deadband)")
+                return True
+            if channel.thingspeak.deferred:
+                print("Upload deferred by the channel's rate limit (sent as soon as it allows)")
+                return True
+            print(f"Upload successful! ({channel.thingspeak.last_latency:.2f}s)")
             return True
             
         except Exception as e:
-            log_error_to_file("ERR_DATA_COLLECTION", str(e))
-            print(f"Error during data collection: {str(e)}")
+            log_error_to_file("ERR_DATA_COLLECTION", f"{channel.name}: {str(e)}")
+            print(f"Error during data collection for {channel.name}: {str(e)}")
             return False
 
+    def _send_queued(self, readings: List[QueuedReading]) -> bool:
+        """Upload readings from the store-and-forward queue with their acquisition times."""
+        channel = self.channels[readings[0].channel]
+        if channel.thingspeak.supports_bulk:
+            success = channel.thingspeak.bulk_upload(
+                [dict(reading.fields, created_at=reading.created_at) for reading in readings])
+            if success and len(readings) > 1:
+                print(f"Uploaded {len(readings)} queued readings of {channel.name} in one request")
+        else:
+            success = channel.thingspeak.upload_data(created_at=readings[0].created_at, wait=True,
+                                                     **readings[0].fields)
+        if not success:
+            log_error_to_file("ERR_DATA_UPLOAD", f"{channel.name}: Failed to upload data to ThingSpeak, "
+                                                 f"{len(self.upload_queue)} readings kept in the upload queue")
+            if channel.thingspeak.rejected:
+                raise UploadRejected(f"ThingSpeak did not accept the reading of {channel.name}")
+        return success
+
+    def _report_sinks(self, results: Dict[str, bool]):
+        """Print the extra sinks a reading could not be sent to."""
+        failed = [name for name, ok in results.items() if not ok and name != 'thingspeak']
+        if failed:
+            print(f"Output failed: {', '.join(failed)}")
+
+    def _send_async(self, hive: str, created_at: Optional[float], fields: Dict[str, Any]) -> bool:
+        """Send a reading to all outputs for the async uploader (runs on an upload worker thread)."""
+        channel = self.channels[hive]
+        results = self.output.send(hive, created_at, fields)
+        success = results['thingspeak']
+        if not success:
+            log_error_to_file("ERR_DATA_UPLOAD", f"{channel.name}: Failed to upload data to ThingSpeak")
+        return success
+
+    def next_interval(self) -> float:
+        """Seconds to wait before the next collection cycle (the fastest hive sets the pace)."""
+        intervals = [channel.sampler.interval for channel in self.channels.values() if channel.sampler]
+        if intervals:
+            return min(intervals)
+        return self.collection_interval
 
+    def close(self):
+        """Release the sensor worker pool and stop the background uploaders."""
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        if self.drainer:
+            # Waits for a send in progress, so the queue is not closed under it
+            self.drainer.stop()
+            # Merged readings not queued yet are kept for the next start
+            for channel in self.channels.values():
+                if len(channel.coalescer):
+                    fields, created_at = channel.coalescer.pop()
+                    self.upload_queue.put(channel.name, created_at, fields)
+            self.upload_queue.close()
+        if self.uploader:
+            self.uploader.stop()
+        for channel in self.channels.values():
+            # A reading deferred by the rate limit goes out now if the channel allows it
+            channel.thingspeak.flush()
+        self.output.close()
+        if self.history:
+            self.history.close()
@@ -0,0 +1,253 @@
+# raspberry_pi_code/data_collection_layer/history.py
+#
+# Local history of all readings: raw readings for a few days plus 5-minute,
+# hourly and daily min/max/mean rollups that are kept much longer. Rollups
+# are updated on every insert, so no batch job ever has to re-read the raw
+# data.
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'history.db')
+
+# Reading fields stored, in column order (the order of ThingSpeak fields 1-5)
+HISTORY_FIELDS = ['indoor_temp', 'indoor_humidity', 'outdoor_temp', 'outdoor_humidity', 'weight']
+
+# Rollup level -> bucket length in seconds (buckets are aligned to UTC)
+ROLLUP_LEVELS = {'5min': 300, 'hour': 3600, 'day': 86400}
+
+# Seconds each level is kept (None: forever)
+DEFAULT_RETENTION = {
+    'raw': 7 * 86400,
+    '5min': 90 * 86400,
+    'hour': 2 * 365 * 86400,
+    'day': None,
+}
+
+
+class HistoryStore:
+    """
+    Embedded time-series store for readings, kept in SQLite.
+
+    Raw readings go to one append-only table indexed by (hive, time). Each
+    rollup level has one row per hive and bucket with count, sum, min and
+    max of every field; an insert updates the current bucket of each level
+    in the same transaction. Like the upload queue, the database runs in WAL
+    mode with synchronous=NORMAL, so an insert is one small append to the
+    write-ahead log. Data older than its level's retention is pruned once
+    per prune_interval.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE,
+                 retention: Optional[Dict[str, Optional[float]]] = None,
+                 prune_interval: float = 3600.0):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            retention: Seconds kept per level ('raw', '5min', 'hour', 'day'),
+                overriding DEFAULT_RETENTION; None keeps a level forever
+            prune_interval: Seconds between two prune passes
+        """
+        self.path = path
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA journal_size_limit=1048576")
+        columns = ", ".join(f"{field} REAL" for field in HISTORY_FIELDS)
+        self._db.execute(f"""
+            CREATE TABLE IF NOT EXISTS readings (
+                id INTEGER PRIMARY KEY,
+                hive TEXT NOT NULL,
+                ts REAL NOT NULL,
+                {columns}
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS readings_hive_ts ON readings (hive, ts)")
+        aggregates = ", ".join(
+            f"{field}_count INTEGER NOT NULL DEFAULT 0, {field}_sum REAL NOT NULL DEFAULT 0, "
+            f"{field}_min REAL, {field}_max REAL" for field in HISTORY_FIELDS)
+        self._db.execute(f"""
+            CREATE TABLE IF NOT EXISTS rollups (
+                level INTEGER NOT NULL,
+                hive TEXT NOT NULL,
+                bucket REAL NOT NULL,
+                {aggregates},
+                PRIMARY KEY (level, hive, bucket)
+            ) WITHOUT ROWID
+        """)
+
+        self._insert_sql = (f"INSERT INTO readings (hive, ts, {', '.join(HISTORY_FIELDS)}) "
+                            f"VALUES (:hive, :ts, {', '.join(':' + f for f in HISTORY_FIELDS)})")
+        updates = ", ".join(
+            f"{f}_count = {f}_count + (:{f} IS NOT NULL), "
+            f"{f}_sum = {f}_sum + COALESCE(:{f}, 0), "
+            f"{f}_min = CASE WHEN :{f} IS NULL THEN {f}_min "
+            f"WHEN {f}_min IS NULL OR :{f} < {f}_min THEN :{f} ELSE {f}_min END, "
+            f"{f}_max = CASE WHEN :{f} IS NULL THEN {f}_max "
+            f"WHEN {f}_max IS NULL OR :{f} > {f}_max THEN :{f} ELSE {f}_max END"
+            for f in HISTORY_FIELDS)
+        self._rollup_sql = (f"UPDATE rollups SET {updates} "
+                            f"WHERE level = :level AND hive = :hive AND bucket = :bucket")
+
+    def add(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> bool:
+        """
+        Store one reading and update the rollups.
+
+        Args:
+            hive: Hive name
+            created_at: Acquisition time (time.time())
+            fields: Field name -> value (None for missing), e.g. {'weight': 42.5}
+
+        Returns:
+            True if the reading was stored
+        """
+        values = {field: fields.get(field) for field in HISTORY_FIELDS}
+        values.update(hive=hive, ts=created_at)
+        try:
+            with self._lock:
+                self._db.execute("BEGIN")
+                try:
+                    self._db.execute(self._insert_sql, values)
+                    for length in ROLLUP_LEVELS.values():
+                        bucket = created_at - created_at % length
+                        self._db.execute("INSERT OR IGNORE INTO rollups (level, hive, bucket) VALUES (?, ?, ?)",
+                                         (length, hive, bucket))
+                        self._db.execute(self._rollup_sql, dict(values, level=length, bucket=bucket))
+                    self._db.execute("COMMIT")
+                except Exception:
+                    self._db.execute("ROLLBACK")
+                    raise
+            if time.time() - self._last_prune >= self.prune_interval:
+                self.prune()
+            return True
+        except sqlite3.Error as e:
+            log_error_to_file("ERR_HISTORY", str(e))
+            return False
+
+    def hives(self, level: Optional[str] = None) -> List[str]:
+        """
+        Names of the hives with data, found with one index lookup per hive.
+
+        Args:
+            level: Only hives with data at this level (default: any level)
+        """
+        if level is None:
+            return sorted(set(self.hives('raw')) | set(self.hives('day')))
+        if level == 'raw':
+            sql, args = "SELECT MIN(hive) FROM readings WHERE hive > ?", ()
+        else:
+            sql, args = "SELECT MIN(hive) FROM rollups WHERE level = ? AND hive > ?", (ROLLUP_LEVELS[level],)
+        names = []
+        with self._lock:
+            row = self._db.execute(sql, args + ('',)).fetchone()
+            while row[0] is not None:
+                names.append(row[0])
+                row = self._db.execute(sql, args + (row[0],)).fetchone()
+        return names
+
+    def query(self, hive: Optional[str] = None, start: Optional[float] = None,
+              end: Optional[float] = None, fields: Optional[List[str]] = None,
+              level: str = 'raw', chunk_size: int = 1000) -> Iterator[Dict[str, Optional[float]]]:
+        """
+        Readings (or rollup buckets) in a time range, streamed in chunks.
+
+        Raw rows are {'hive', 'created_at', <field>: value}. Rollup rows are
+        {'hive', 'created_at' (bucket start), <field>_mean, <field>_min,
+        <field>_max, <field>_count}. Rows come hive by hive, oldest first;
+        at most chunk_size rows are held in memory at a time.
+
+        Args:
+            hive: Only this hive (default: all)
+            start: First time included (time.time(), default: oldest)
+            end: First time excluded (default: newest)
+            fields: Only these fields (default: all)
+            level: 'raw', '5min', 'hour' or 'day'
+            chunk_size: Rows fetched per database read
+        """
+        if level != 'raw' and level not in ROLLUP_LEVELS:
+            raise ValueError(f"Unknown history level: {level}")
+        fields = list(fields) if fields else HISTORY_FIELDS
+        unknown = set(fields) - set(HISTORY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        if level == 'raw':
+            table, time_column, key_column = "readings", "ts", "id"
+            columns = list(fields)
+            where = ""
+        else:
+            table, time_column, key_column = "rollups", "bucket", "bucket"
+            columns = [f"{f}_{a}" for f in fields for a in ('sum', 'min', 'max', 'count')]
+            where = f"level = {ROLLUP_LEVELS[level]} AND "
+        sql = (f"SELECT {time_column}, {key_column}, {', '.join(columns)} FROM {table} "
+               f"WHERE {where}hive = ? AND {time_column} >= ? AND {time_column} < ? "
+               f"AND ({time_column} > ? OR {key_column} > ?) ORDER BY {time_column}, {key_column} LIMIT ?")
+
+        for name in ([hive] if hive else self.hives(level)):
+            # Keyset pagination: each chunk starts after the last row of the previous one
+            last_time, last_key = (float('-inf') if start is None else start), float('-inf')
+            while True:
+                with self._lock:
+                    rows = self._db.execute(sql, (name, last_time, float('inf') if end is None else end,
+                                                  last_time, last_key, chunk_size)).fetchall()
+                for row in rows:
+                    yield self._row(name, level, fields, row)
+                if len(rows) < chunk_size:
+                    break
+                last_time, last_key = rows[-1][0], rows[-1][1]
+
+    @staticmethod
+    def _row(hive: str, level: str, fields: List[str], row) -> Dict[str, Optional[float]]:
+        result = {'hive': hive, 'created_at': row[0]}
+        if level == 'raw':
+            result.update(zip(fields, row[2:]))
+            return result
+        for index, field in enumerate(fields):
+            total, low, high, count = row[2 + 4 * index:6 + 4 * index]
+            result[f"{field}_mean"] = round(total / count, 3) if count else None
+            result[f"{field}_min"] = low
+            result[f"{field}_max"] = high
+            result[f"{field}_count"] = count
+        return result
+
+    def latest(self, hive: str) -> Optional[Dict[str, Optional[float]]]:
+        """The newest raw reading of a hive, or None."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT ts, id, {', '.join(HISTORY_FIELDS)} FROM readings "
+                f"WHERE hive = ? ORDER BY ts DESC LIMIT 1", (hive,)).fetchone()
+        return self._row(hive, 'raw', HISTORY_FIELDS, row) if row else None
+
+    def prune(self, now: Optional[float] = None):
+        """Delete raw readings and rollups older than their retention."""
+        now = time.time() if now is None else now
+        self._last_prune = now
+        try:
+            if self.retention.get('raw') is not None:
+                # Per hive, so each delete is a range of the (hive, ts) index
+                for hive in self.hives('raw'):
+                    with self._lock:
+                        self._db.execute("DELETE FROM readings WHERE hive = ? AND ts < ?",
+                                         (hive, now - self.retention['raw']))
+            # Rollups by time alone: a hive whose raw readings expired still has rollups
+            for level, length in ROLLUP_LEVELS.items():
+                if self.retention.get(level) is not None:
+                    with self._lock:
+                        self._db.execute("DELETE FROM rollups WHERE level = ? AND bucket < ?",
+                                         (length, now - self.retention[level]))
+        except sqlite3.Error as e:
+            log_error_to_file("ERR_HISTORY", str(e))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,206 @@
+# raspberry_pi_code/data_collection_layer/scheduler.py
+
+import math
+import time
+import heapq
+import itertools
+from collections import deque
+from typing import Dict, Hashable, List, Optional
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+class CycleScheduler:
+    """
+    Runs the collection loop on fixed deadlines of the monotonic clock.
+
+    Sleeping for the interval after each cycle adds the cycle's own duration
+    to every period, so the loop drifts against the wall clock. Here each
+    deadline is the previous deadline plus the interval, independent of how
+    long the cycle took. With align=True the deadlines sit on wall-clock
+    boundaries (e.g. every full minute). The alignment is taken once, when
+    the interval is set, and the deadlines then follow the monotonic clock,
+    so an NTP step does not make the loop jump.
+
+    A cycle that overruns one or more slots is handled by policy: 'skip'
+    continues with the next slot in the future, 'catch_up' runs the missed
+    slots back to back (at most max_catch_up, the rest are skipped).
+    """
+
+    POLICIES = ('skip', 'catch_up')
+
+    def __init__(self, interval: float, policy: str = 'skip', align: bool = True,
+                 max_catch_up: int = 3, history: int = 1000):
+        """
+        Args:
+            interval: Seconds between cycles
+            policy: 'skip' or 'catch_up' for slots missed by an overrunning cycle
+            align: Put the deadlines on wall-clock multiples of the interval
+            max_catch_up: Most missed slots run with 'catch_up'
+            history: Number of cycles kept for the jitter statistics
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown schedule policy: {policy}")
+        self.interval = interval
+        self.policy = policy
+        self.align = align
+        self.max_catch_up = max_catch_up
+
+        self.cycles = 0
+        self.skipped = 0      # Slots dropped
+        self.caught_up = 0    # Slots run late, back to back
+        self.lateness = deque(maxlen=history)   # Seconds each cycle started after its deadline
+        self._deadline: Optional[float] = None
+        self._deadline_interval: Optional[float] = None
+
+    def _aligned_slot(self, after: float) -> float:
+        """First wall-clock boundary of the interval after the monotonic time `after`."""
+        if not self.align:
+            return after + self.interval
+        offset = time.time() - time.monotonic()
+        wall = after + offset
+        return (math.floor(wall / self.interval) + 1) * self.interval - offset
+
+    def _next_deadline(self, now: float) -> float:
+        if self.interval != self._deadline_interval:
+            # New interval: start a new grid after the last deadline
+            deadline = self._aligned_slot(self._deadline)
+        else:
+            deadline = self._deadline + self.interval
+        self._deadline_interval = self.interval
+
+        if deadline < now:
+            missed = int((now - deadline) // self.interval) + 1
+            allowed = self.max_catch_up if self.policy == 'catch_up' else 0
+            if missed > allowed:
+                # Move to the first slot that can still be kept
+                dropped = missed - allowed
+                deadline += dropped * self.interval
+                self.skipped += dropped
+            if deadline < now:
+                self.caught_up += 1
+        return deadline
+
+    def wait(self, interval: Optional[float] = None) -> float:
+        """
+        Sleep until the next cycle is due. The first call returns at once.
+
+        Args:
+            interval: New interval from here on (e.g. from the adaptive sampler)
+
+        Returns:
+            Seconds the cycle starts after its deadline
+        """
+        if interval is not None:
+            self.interval = interval
+        now = time.monotonic()
+        self.cycles += 1
+        if self._deadline is None:
+            # Run right away, then fall onto the grid
+            self._deadline = self._aligned_slot(now) - self.interval if self.align else now
+            self._deadline_interval = self.interval
+            return 0.0
+
+        self._deadline = self._next_deadline(now)
+        delay = self._deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        late = max(0.0, time.monotonic() - self._deadline)
+        self.lateness.append(late)
+        return late
+
+    def stats(self) -> Dict[str, float]:
+        """Jitter statistics (seconds) over the recent cycles."""
+        result = {'cycles': self.cycles, 'skipped': self.skipped, 'caught_up': self.caught_up}
+        if self.lateness:
+            values = list(self.lateness)
+            result.update(mean=sum(values) / len(values), p50=_percentile(values, 0.5),
+                          p95=_percentile(values, 0.95), max=max(values))
+        return result
+
+    def report(self) -> str:
+        """One-line summary of stats()."""
+        stats = self.stats()
+        if 'mean' not in stats:
+            return "Schedule: no cycles yet"
+        return (f"Schedule: {stats['cycles']} cycles, start jitter mean {stats['mean'] * 1000:.1f} ms, "
+                f"p95 {stats['p95'] * 1000:.1f} ms, max {stats['max'] * 1000:.1f} ms, "
+                f"{stats['skipped']} slots skipped, {stats['caught_up']} run late")
+
+
+class SensorSchedule:
+    """
+    Read deadlines of sensors with their own period, kept in a heap.
+
+    Each sensor is read on wall-clock boundaries of its period, shifted by its
+    phase: period 300 with phase 30 reads at :00:30, :05:30, ... A collection
+    cycle asks due() which sensors to read; a sensor is read by the cycle
+    closest to its deadline (within tolerance), so periods and phases are best
+    multiples of the collection interval. Like CycleScheduler, deadlines follow
+    the monotonic clock and slots missed by a late cycle are skipped. Every
+    sensor is due at the first call; retry() makes a sensor whose read failed
+    due again at the next call, without moving its regular slots.
+    """
+
+    def __init__(self, periods: Dict[Hashable, float],
+                 phases: Optional[Dict[Hashable, float]] = None,
+                 tolerance: float = 0.0, align: bool = True):
+        """
+        Args:
+            periods: Sensor key -> seconds between two reads
+            phases: Sensor key -> seconds after the period boundary (default 0)
+            tolerance: A sensor due up to this many seconds after now is read now
+            align: Put the deadlines on wall-clock multiples of the periods
+        """
+        for key, period in periods.items():
+            if period <= 0:
+                raise ValueError(f"Sensor period must be positive: {key}")
+        self.periods = dict(periods)
+        self.phases = dict(phases or {})
+        self.tolerance = tolerance
+        self.align = align
+        self._order = itertools.count()   # Tie-breaker, keys need not be comparable
+        self._heap: List = [(float('-inf'), next(self._order), key) for key in self.periods]
+        heapq.heapify(self._heap)
+        self._offset: Optional[float] = None
+        self._retry: List[Hashable] = []
+
+    def _next_slot(self, key: Hashable, after: float) -> float:
+        """First deadline of key later than the monotonic time `after`."""
+        period, phase = self.periods[key], self.phases.get(key, 0.0)
+        offset = self._offset if self.align else 0.0
+        return (math.floor((after + offset - phase) / period) + 1) * period + phase - offset
+
+    def due(self, now: Optional[float] = None) -> List[Hashable]:
+        """
+        Sensors to read now; they are scheduled for their next slot.
+
+        Args:
+            now: time.monotonic() of the cycle (default: now)
+        """
+        now = time.monotonic() if now is None else now
+        if self._offset is None:
+            # Wall clock - monotonic clock, taken once so NTP steps do not move the slots
+            self._offset = time.time() - time.monotonic()
+        keys, self._retry = self._retry, []
+        while self._heap and self._heap[0][0] <= now + self.tolerance:
+            _, _, key = heapq.heappop(self._heap)
+            if key not in keys:
+                keys.append(key)
+            heapq.heappush(self._heap, (self._next_slot(key, now + self.tolerance), next(self._order), key))
+        return keys
+
+    def retry(self, key: Hashable):
+        """Read key again at the next due() call (e.g. after a failed read)."""
+        if key in self.periods and key not in self._retry:
+            self._retry.append(key)
+
+    def next_due(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until the next sensor is due (None without sensors)."""
+        if not self._heap:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._heap[0][0] - now)
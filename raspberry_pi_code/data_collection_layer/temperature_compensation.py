@@ -0,0 +1,140 @@
+# raspberry_pi_code/data_collection_layer/temperature_compensation.py
+
+import os
+import json
+import time
+from typing import Optional
+import numpy as np
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+COMPENSATION_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'temperature_compensation.json')
+
+
+class TemperatureCompensator:
+    """
+    Removes the temperature drift of the load cells and the HX711 from weight readings.
+
+    Weight/temperature pairs are kept in fixed-size NumPy ring buffers. The drift
+    coefficient (weight units per °C) is fitted by least squares on lagged
+    differences, dweight = a + k * dtemp, which cancels the hive's slowly
+    changing level. Steps from inspections or added supers are dropped as
+    median/MAD outliers before the fit.
+    """
+
+    def __init__(self, history_size: int = 10080, min_samples: int = 720,
+                 refit_every: int = 60, lag: int = 15,
+                 reference_temperature: float = 20.0,
+                 state_file: Optional[str] = COMPENSATION_FILE):
+        """
+        Args:
+            history_size: Pairs kept for fitting (10080 = one week at one reading per minute)
+            min_samples: Pairs required before a coefficient is fitted
+            refit_every: Refit the coefficient after this many new pairs
+            lag: Distance in samples between the two readings of a difference
+            reference_temperature: Temperature (°C) at which no correction is applied
+            state_file: JSON file the fitted coefficient is saved to (None to disable)
+        """
+        self.history_size = history_size
+        self.min_samples = min_samples
+        self.refit_every = refit_every
+        self.lag = lag
+        self.reference_temperature = reference_temperature
+        self.state_file = state_file
+
+        self._weights = np.zeros(history_size, dtype=np.float64)
+        self._temperatures = np.zeros(history_size, dtype=np.float64)
+        self._count = 0
+        self._since_fit = 0
+
+        self.coefficient: Optional[float] = None
+        self.fit_samples = 0
+        self._load()
+
+    def _load(self):
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            self.coefficient = state.get('coefficient')
+            self.fit_samples = state.get('fit_samples', 0)
+        except Exception as e:
+            log_error_to_file("ERR_COMPENSATION_LOAD", str(e))
+
+    def _save(self):
+        if not self.state_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(self.state_file, 'w') as f:
+                json.dump({
+                    'coefficient': self.coefficient,
+                    'fit_samples': self.fit_samples,
+                    'reference_temperature': self.reference_temperature,
+                    'fit_date': time.strftime('%Y-%m-%d %H:%M:%S')
+                }, f, indent=4)
+        except Exception as e:
+            log_error_to_file("ERR_COMPENSATION_SAVE", str(e))
+
+    def add(self, weight: Optional[float], temperature: Optional[float]):
+        """Record one uncompensated weight/temperature pair; refits periodically."""
+        if weight is None or temperature is None:
+            return
+        index = self._count % self.history_size
+        self._weights[index] = weight
+        self._temperatures[index] = temperature
+        self._count += 1
+        self._since_fit += 1
+        if self._since_fit >= self.refit_every and min(self._count, self.history_size) >= self.min_samples:
+            self.fit()
+
+    def _history(self):
+        n = min(self._count, self.history_size)
+        order = np.arange(self._count - n, self._count) % self.history_size
+        return self._weights[order], self._temperatures[order]
+
+    def fit(self) -> Optional[float]:
+        """
+        Fit the drift coefficient from the stored history.
+
+        Returns:
+            The coefficient in weight units per °C, or None if the history
+            does not constrain it (too short or no temperature variation)
+        """
+        self._since_fit = 0
+        weights, temperatures = self._history()
+        if weights.size <= self.lag + 2:
+            return None
+
+        dw = weights[self.lag:] - weights[:-self.lag]
+        dt = temperatures[self.lag:] - temperatures[:-self.lag]
+
+        # Drop weight steps (inspections, swarms, added supers)
+        median = np.median(dw)
+        mad = 1.4826 * np.median(np.abs(dw - median))
+        if mad > 0:
+            keep = np.abs(dw - median) <= 5 * mad
+            dw, dt = dw[keep], dt[keep]
+
+        if dt.size < 3 or np.ptp(dt) == 0:
+            return None
+
+        design = np.column_stack([np.ones_like(dt), dt])
+        solution, _, rank, _ = np.linalg.lstsq(design, dw, rcond=None)
+        if rank < 2:
+            return None
+
+        self.coefficient = float(solution[1])
+        self.fit_samples = int(dt.size)
+        self._save()
+        return self.coefficient
+
+    def compensate(self, weight: Optional[float], temperature: Optional[float]) -> Optional[float]:
+        """
+        Return the weight corrected to the reference temperature.
+        The weight is returned unchanged while no coefficient is known or
+        the temperature reading is missing.
+        """
+        if weight is None or temperature is None or self.coefficient is None:
+            return weight
+        return weight - self.coefficient * (temperature - self.reference_temperature)
@@ -1,38 +1,352 @@
 # raspberry_pi_code/errors.py
 
 import os
+import re
 import json
 import time
+import queue
+import atexit
+import threading
+
+ERROR_LOG_FILE = "/home/pi/BUZZWatch/errors/errors.jsonl"
+ERROR_LOG_MAX_BYTES = 1024 * 1024       # Rotate the active segment at this size
+ERROR_LOG_MAX_AGE = 7 * 24 * 3600       # ... or when its first entry is this many seconds old
+ERROR_LOG_BACKUPS = 5                   # Rotated segments kept (errors.jsonl.1 is the newest)
+ERROR_DEDUP_INTERVAL = 3600             # Repeats of an error are folded into one entry per hour
+ERROR_RATE_LIMIT = 30                   # Maximum entries written per minute
+ERROR_QUEUE_SIZE = 1000                 # Errors waiting for the writer thread before new ones are dropped
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# "hive1/indoor: ...", "hive2: ...": the label the error message starts with
+_CONTEXT_PATTERN = re.compile(r"^([\w./@-]{1,64}): ")
+
+
+class JSONLinesLog:
+    """
+    Append-only JSON-lines log split into rotating segments.
+
+    Every entry is one line written with a single append, so logging costs
+    the same no matter how large the log is, and a crash can at worst leave
+    one truncated last line (skipped by read_entries()). The active segment
+    is rotated by renaming it to <path>.1 (older segments move up by one)
+    once it exceeds max_bytes or its first entry is older than max_age
+    seconds; each rename is atomic.
+    """
+
+    def __init__(self, path, max_bytes=ERROR_LOG_MAX_BYTES, max_age=ERROR_LOG_MAX_AGE,
+                 backups=ERROR_LOG_BACKUPS):
+        """
+        Args:
+            path: Active segment file
+            max_bytes: Segment size in bytes that triggers a rotation (None to disable)
+            max_age: Segment age in seconds that triggers a rotation (None to disable)
+            backups: Number of rotated segments kept
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self._file = None
+        self._inode = None
+        self._size = 0
+        self._started = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        stat = os.fstat(self._file.fileno())
+        self._inode = stat.st_ino
+        self._size = stat.st_size
+        self._started = self._first_entry_time() if self._size else None
+        if self._size and not self._ends_with_newline():
+            # Terminate a line cut off by a crash so the next entry starts clean
+            self._file.write("\n")
+            self._size += 1
+
+    def _first_entry_time(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                first = json.loads(f.readline())
+            return time.mktime(time.strptime(first["timestamp"], TIMESTAMP_FORMAT))
+        except (OSError, ValueError, KeyError, TypeError):
+            return time.time()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _reopen_if_rotated(self):
+        # Another process (e.g. a test script) may have rotated the segment
+        try:
+            if os.stat(self.path).st_ino == self._inode:
+                return
+        except FileNotFoundError:
+            pass
+        self._close()
+        self._open()
+
+    def _should_rotate(self, now):
+        if self._size == 0:
+            return False
+        if self.max_bytes and self._size >= self.max_bytes:
+            return True
+        return bool(self.max_age and self._started is not None and now - self._started >= self.max_age)
+
+    def _rotate(self):
+        self._close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def append(self, entry):
+        """Append one JSON-serialisable entry as a line."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        now = time.time()
+        with self._lock:
+            if self._file is None:
+                self._open()
+            else:
+                self._reopen_if_rotated()
+            if self._should_rotate(now):
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line.encode("utf-8"))
+            if self._started is None:
+                self._started = now
+
+    def segments(self):
+        """Existing segment files, oldest first."""
+        paths = [f"{self.path}.{index}" for index in range(self.backups, 0, -1)] + [self.path]
+        return [path for path in paths if os.path.exists(path)]
+
+    def read_entries(self):
+        """Yield all entries, oldest first. Lines that do not parse are skipped."""
+        for path in self.segments():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+class _ErrorSummary:
+    """Occurrences of one error code not written to the log yet."""
+
+    def __init__(self, message, seen):
+        self.message = message
+        self.count = 1
+        self.first_seen = seen
+        self.last_seen = seen
+
+
+def _error_context(error_message):
+    """The hive or sensor an error message is about ("hive1/indoor: ..."), or None."""
+    match = _CONTEXT_PATTERN.match(error_message)
+    return match.group(1) if match else None
+
+
+class ErrorReporter:
+    """
+    Writes errors on a background thread so sensor code never waits for the SD card.
+
+    report() only puts the error on a bounded queue. The writer thread folds
+    repeats of the same error (same code and the same hive or sensor label the
+    message starts with, so errors of different hives or sensors stay apart)
+    into one entry that keeps the latest message: an error that was not written
+    recently is written on the writer's next pass (within about a second),
+    later repeats are counted and written as a single entry with "count",
+    "first_seen" and "last_seen" once dedup_interval seconds have passed since
+    that error was last written. Writes are limited by a
+    token bucket of rate_limit entries per minute; what does not fit waits in
+    the pending summaries. Errors that arrive while the queue or the pending
+    table is full are counted and reported as ERR_LOG_DROPPED.
+    """
+
+    def __init__(self, log, dedup_interval=ERROR_DEDUP_INTERVAL, rate_limit=ERROR_RATE_LIMIT,
+                 queue_size=ERROR_QUEUE_SIZE, max_pending=256):
+        """
+        Args:
+            log: JSONLinesLog the entries are written to
+            dedup_interval: Minimum seconds between two entries of the same error
+            rate_limit: Maximum entries written per minute (also the burst size)
+            queue_size: Errors that can wait for the writer thread
+            max_pending: Distinct errors (code and hive/sensor) that can wait for their summary
+        """
+        self.log = log
+        self.dedup_interval = dedup_interval
+        self.rate_limit = rate_limit
+        self.max_pending = max_pending
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._pending = {}
+        self._last_written = {}
+        self._tokens = float(rate_limit)
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self._drop_lock = threading.Lock()    # report() must not wait for the writer's _lock
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.written = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self._dropped_reported = 0
+
+    def report(self, error_code, error_message):
+        """Queue an error for writing. Never blocks."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((error_code, error_message, time.time()))
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="error-log", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+            with self._lock:
+                if item is not None:
+                    self._merge(item)
+                self._drain()
+                self._flush()
+
+    def _drain(self):
+        while True:
+            try:
+                self._merge(self._queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _merge(self, item):
+        error_code, error_message, seen = item
+        key = (error_code, _error_context(error_message))
+        summary = self._pending.get(key)
+        if summary is None:
+            if len(self._pending) >= self.max_pending:
+                with self._drop_lock:
+                    self.dropped += 1
+                return
+            self._pending[key] = _ErrorSummary(error_message, seen)
+            return
+        summary.message = error_message
+        summary.count += 1
+        summary.last_seen = seen
+        self.suppressed += 1
+
+    def _take_token(self):
+        now = time.monotonic()
+        self._tokens = min(float(self.rate_limit),
+                           self._tokens + (now - self._refilled) * self.rate_limit / 60.0)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _flush(self, force=False):
+        now = time.monotonic()
+        for key in sorted(self._pending, key=lambda key: self._pending[key].first_seen):
+            last_written = self._last_written.get(key)
+            if not force and last_written is not None and now - last_written < self.dedup_interval:
+                continue
+            if not force and not self._take_token():
+                break
+            self._write(key[0], self._pending.pop(key))
+            self._last_written[key] = now
+
+        # Errors quiet for a whole interval may be written immediately again
+        for key, last_written in list(self._last_written.items()):
+            if now - last_written >= self.dedup_interval and key not in self._pending:
+                del self._last_written[key]
+
+        with self._drop_lock:
+            dropped = self.dropped
+        if dropped > self._dropped_reported and (force or self._take_token()):
+            self._write("ERR_LOG_DROPPED", _ErrorSummary(
+                f"{dropped - self._dropped_reported} errors dropped (queue full)", time.time()))
+            self._dropped_reported = dropped
+
+    def _write(self, error_code, summary):
+        error_data = {
+            "code": error_code,
+            "message": summary.message,
+            "timestamp": time.strftime(TIMESTAMP_FORMAT, time.localtime(summary.last_seen))
+        }
+        if summary.count > 1:
+            error_data["count"] = summary.count
+            error_data["first_seen"] = time.strftime(TIMESTAMP_FORMAT, time.localtime(summary.first_seen))
+            error_data["last_seen"] = error_data["timestamp"]
+        try:
+            self.log.append(error_data)
+            self.written += 1
+        except OSError as e:
+            # Logging must never take the data collection down
+            print(f"Could not write error log: {str(e)}")
+
+    def flush(self):
+        """Write everything queued or pending now, ignoring the rate limit."""
+        with self._lock:
+            self._drain()
+            self._flush(force=True)
+
+    def close(self):
+        """Stop the writer thread and write what is left."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5.0)
+        self.flush()
+        self.log.close()
+
+
+error_log = JSONLinesLog(ERROR_LOG_FILE)
+error_reporter = ErrorReporter(error_log)
 
-ERROR_LOG_FILE = "/home/pi/BUZZWatch/errors/errors.json"
-os.makedirs(os.path.dirname(ERROR_LOG_FILE), exist_ok=True)
 
 def log_error_to_file(error_code, error_message):
     """
-    Logs an error to a JSON file in the 'errors' directory.
+    Logs an error to the JSON-lines error log in the 'errors' directory.
+    The entry is written by a background thread; repeats of the same code
+    for the same hive or sensor are folded into counters and the write rate is capped (see ErrorReporter).
+    The directory is created on the first written error, not at import time.
 
     Args:
         error_code (str): A unique code for the error type.
         error_message (str): Detailed error message.
     """
-    error_data = {
-        "code": error_code,
-        "message": error_message,
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-    }
-
-    # Load existing errors or start fresh
-    if os.path.exists(ERROR_LOG_FILE):
-        try:
-            with open(ERROR_LOG_FILE, "r") as f:
-                errors = json.load(f)
-        except json.JSONDecodeError:
-            errors = []
-    else:
-        errors = []
-
-    errors.append(error_data)
-
-    # Write updated list back to disk
-    with open(ERROR_LOG_FILE, "w") as f:
-        json.dump(errors, f, indent=4)
+    error_reporter.report(error_code, error_message)
+
+
+def read_errors():
+    """Return all logged errors, oldest first (call error_reporter.flush() first to include queued ones)."""
+    return list(error_log.read_entries())
@@ -0,0 +1,143 @@
+# raspberry_pi_code/hardware_layer/calibration.py
+
+import os
+import json
+import numpy as np
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+# Define path for calibration data
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'hx711_calibration.json')
+
+DEFAULT_CALIBRATION = {
+    'reference_unit': 1,
+    'zero_offset': 0,
+}
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    """
+    Load HX711 calibration data without touching any hardware.
+
+    Args:
+        path: Calibration JSON file
+
+    Returns:
+        dict with at least 'reference_unit' and 'zero_offset' (defaults if no file)
+    """
+    calibration = dict(DEFAULT_CALIBRATION)
+    if not os.path.exists(path):
+        print("No HX711 calibration file found. Using default values.")
+        return calibration
+
+    try:
+        with open(path, 'r') as f:
+            calibration.update(json.load(f))
+        print(f"Loaded HX711 calibration: reference_unit={calibration['reference_unit']}, "
+              f"zero_offset={calibration['zero_offset']}")
+    except Exception as e:
+        log_error_to_file("ERR_HX711_CALIBRATION_LOAD", str(e))
+        print(f"Error loading HX711 calibration: {str(e)}")
+    return calibration
+
+
+def save_calibration(calibration_data, path=CALIBRATION_FILE):
+    """Write calibration data to the calibration JSON file."""
+    # Ensure config directory exists
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'w') as f:
+        json.dump(calibration_data, f, indent=4)
+
+
+def is_calibrated(path=CALIBRATION_FILE):
+    """Check if the HX711 sensor has been calibrated."""
+    return os.path.exists(path)
+
+
+class CalibrationModel:
+    """
+    Precomputed raw-count to weight evaluator.
+
+    Evaluates weight = p(x) with x = raw_offset + raw_scale * raw, where p
+    has the given coefficients (highest power first). Mapping the 24-bit
+    raw counts to a small x range keeps higher-degree fits well
+    conditioned. Single-point calibrations are the degree-1 case
+    weight = (raw - zero_offset) / reference_unit.
+    """
+
+    def __init__(self, coefficients, raw_offset=0.0, raw_scale=1.0):
+        self.coefficients = tuple(float(c) for c in coefficients)
+        self.raw_offset = float(raw_offset)
+        self.raw_scale = float(raw_scale)
+        # Coefficients of dp/dx, used to convert raw-count uncertainty to weight
+        degree = len(self.coefficients) - 1
+        self.slope_coefficients = tuple(c * (degree - i) for i, c in enumerate(self.coefficients[:-1])) or (0.0,)
+
+    @staticmethod
+    def _horner(coefficients, x):
+        result = 0.0
+        for c in coefficients:
+            result = result * x + c
+        return result
+
+    def __call__(self, raw):
+        """Weight for a raw count (scalar) or NumPy array of counts."""
+        if isinstance(raw, np.ndarray):
+            return np.polyval(self.coefficients, self.raw_offset + self.raw_scale * raw)
+        return self._horner(self.coefficients, self.raw_offset + self.raw_scale * float(raw))
+
+    def slope(self, raw):
+        """d(weight)/d(raw) at the given raw count."""
+        x = self.raw_offset + self.raw_scale * float(raw)
+        return self._horner(self.slope_coefficients, x) * self.raw_scale
+
+    @classmethod
+    def from_calibration(cls, calibration):
+        """Build the evaluator from calibration data (multi-point model or legacy values)."""
+        model = calibration.get('model')
+        if model and model.get('coefficients'):
+            return cls(model['coefficients'], model.get('raw_offset', 0.0), model.get('raw_scale', 1.0))
+
+        reference_unit = calibration.get('reference_unit', 1)
+        if reference_unit == 0:
+            return cls([0.0, 0.0])
+        return cls([1.0 / reference_unit, -calibration.get('zero_offset', 0) / reference_unit])
+
+
+def fit_calibration_model(raw_values, weights, degree=1):
+    """
+    Least-squares fit of weight = p(raw) over N reference points.
+
+    Args:
+        raw_values: Raw HX711 count measured for each reference weight
+        weights: Known reference weights (same unit as the calibration, e.g. grams)
+        degree: Polynomial degree (1 = linear)
+
+    Returns:
+        dict with 'type', 'degree', 'coefficients' (highest power first),
+        'raw_offset'/'raw_scale' (x = raw_offset + raw_scale * raw),
+        'residuals' (per point, in weight units) and 'rmse'
+    """
+    raw = np.asarray(raw_values, dtype=np.float64)
+    weight = np.asarray(weights, dtype=np.float64)
+    if raw.size != weight.size:
+        raise ValueError("raw_values and weights must have the same length")
+    if np.unique(raw).size < degree + 1:
+        raise ValueError(f"A degree {degree} fit needs at least {degree + 1} distinct reference points")
+
+    fit = np.polynomial.Polynomial.fit(raw, weight, degree)
+    raw_offset, raw_scale = fit.mapparms()
+    coefficients = np.zeros(degree + 1)
+    coefficients[:fit.coef.size] = fit.coef
+    coefficients = coefficients[::-1]
+
+    residuals = weight - np.polyval(coefficients, raw_offset + raw_scale * raw)
+    return {
+        'type': 'polynomial',
+        'degree': degree,
+        'coefficients': coefficients.tolist(),
+        'raw_offset': float(raw_offset),
+        'raw_scale': float(raw_scale),
+        'residuals': residuals.tolist(),
+        'rmse': float(np.sqrt(np.mean(residuals ** 2))),
+    }
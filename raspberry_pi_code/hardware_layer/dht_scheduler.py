@@ -0,0 +1,112 @@
+# raspberry_pi_code/hardware_layer/dht_scheduler.py
+
+import time
+import threading
+from collections import namedtuple
+from typing import Dict, Optional
+
+# temperature (°C), humidity (% RH), timestamp (time.time() of the bus read)
+DHTSample = namedtuple('DHTSample', ['temperature', 'humidity', 'timestamp'])
+
+
+class _SensorState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.last_attempt: Optional[float] = None   # monotonic time of the last bus read
+        self.sample: Optional[DHTSample] = None     # last good sample
+        self.sample_time: Optional[float] = None    # monotonic time of the last good sample
+
+
+class DHTScheduler:
+    """
+    Decides when a DHT22 may actually be read.
+
+    The DHT22 cannot produce a new sample more often than every 2 seconds;
+    polling it faster only returns the driver's cached value or raises
+    RuntimeError. The scheduler remembers when each sensor was last read and
+    its last good sample. A read inside the minimum period, or a failed
+    read, returns the cached sample as long as it is younger than the
+    time-to-live.
+    """
+
+    def __init__(self, min_period: float = 2.0, ttl: float = 120.0, retries: int = 1):
+        """
+        Args:
+            min_period: Minimum seconds between two bus reads of the same sensor
+            ttl: Maximum age in seconds of a cached sample that may still be returned
+            retries: Extra bus reads (each min_period apart) when a read fails
+                and no cached sample is available
+        """
+        self.min_period = min_period
+        self.ttl = ttl
+        self.retries = retries
+        self._states: Dict[str, _SensorState] = {}
+        self._states_lock = threading.Lock()
+
+    def _state(self, name: str) -> _SensorState:
+        with self._states_lock:
+            if name not in self._states:
+                self._states[name] = _SensorState()
+            return self._states[name]
+
+    def _cached(self, state: _SensorState) -> Optional[DHTSample]:
+        if state.sample is None or time.monotonic() - state.sample_time > self.ttl:
+            return None
+        return state.sample
+
+    def _bus_read(self, state: _SensorState, sensor) -> Optional[DHTSample]:
+        state.last_attempt = time.monotonic()
+        # Reading temperature triggers the measurement; humidity comes from the same one
+        temperature = sensor.temperature
+        humidity = sensor.humidity
+        if temperature is None or humidity is None:
+            return None
+        sample = DHTSample(temperature, humidity, time.time())
+        state.sample = sample
+        state.sample_time = state.last_attempt
+        return sample
+
+    def read(self, name: str, sensor) -> Optional[DHTSample]:
+        """
+        Return a sample for the sensor, touching the bus only if a fresh
+        sample is possible.
+
+        Args:
+            name: Key identifying the sensor
+            sensor: adafruit_dht.DHT22 compatible object
+
+        Returns:
+            DHTSample (possibly cached) or None if no sample within the TTL is available
+
+        Raises:
+            Exceptions other than RuntimeError raised by the driver
+        """
+        state = self._state(name)
+        with state.lock:
+            attempts = 0
+            while True:
+                if state.last_attempt is not None:
+                    wait = self.min_period - (time.monotonic() - state.last_attempt)
+                    if wait > 0:
+                        cached = self._cached(state)
+                        if cached is not None or attempts == 0:
+                            return cached
+                        # Retrying after a failure: wait until the sensor can measure again
+                        time.sleep(wait)
+
+                attempts += 1
+                try:
+                    sample = self._bus_read(state, sensor)
+                    if sample is not None:
+                        return sample
+                except RuntimeError:
+                    # DHT22 sometimes fails to read, this is normal
+                    pass
+
+                cached = self._cached(state)
+                if cached is not None or attempts > self.retries:
+                    return cached
+
+    def last_sample(self, name: str) -> Optional[DHTSample]:
+        """Last good sample for the sensor regardless of its age."""
+        return self._state(name).sample
@@ -0,0 +1,168 @@
+# raspberry_pi_code/hardware_layer/filters.py
+#
+# Streaming filters for raw HX711 counts. Each filter keeps a small,
+# fixed amount of state, is updated once per raw sample and returns an
+# estimate together with its standard error, so the weight smoothing is
+# carried across read_weight() calls instead of starting from scratch.
+
+import math
+from bisect import insort, bisect_left
+from collections import deque, namedtuple
+import numpy as np
+
+# value: filtered estimate, stderr: 1-sigma uncertainty of the estimate (same units)
+FilterEstimate = namedtuple('FilterEstimate', ['value', 'stderr'])
+
+# Scale factor turning a median absolute deviation into a standard deviation
+MAD_TO_SIGMA = 1.4826
+
+
+def robust_mean(values, threshold=3.5):
+    """
+    Mean of the values after dropping outliers by the median/MAD rule.
+    Vectorised replacement for sort-and-trim averaging.
+
+    Args:
+        values: Sequence of raw samples
+        threshold: Samples further than threshold * sigma from the median are dropped
+
+    Returns:
+        FilterEstimate or None for an empty input
+    """
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return None
+    median = np.median(data)
+    sigma = MAD_TO_SIGMA * np.median(np.abs(data - median))
+    if sigma > 0:
+        data = data[np.abs(data - median) <= threshold * sigma]
+    stderr = float(data.std(ddof=1) / math.sqrt(data.size)) if data.size > 1 else 0.0
+    return FilterEstimate(float(data.mean()), stderr)
+
+
+class RollingMedianFilter:
+    """
+    Rolling median/MAD (Hampel) filter over the last `window` samples.
+
+    Samples within threshold * sigma of the window median are averaged;
+    spikes outside that band are ignored. State is the window itself,
+    kept in arrival order and in sorted order.
+    """
+
+    def __init__(self, window=15, threshold=3.5):
+        self.window = window
+        self.threshold = threshold
+        self._fifo = deque()
+        self._sorted = []
+
+    def reset(self):
+        self._fifo.clear()
+        self._sorted = []
+
+    def update(self, value):
+        """Add one raw sample and return the current FilterEstimate."""
+        value = float(value)
+        self._fifo.append(value)
+        insort(self._sorted, value)
+        if len(self._fifo) > self.window:
+            oldest = self._fifo.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        return self.estimate()
+
+    def estimate(self):
+        """Current FilterEstimate, or None before the first sample."""
+        n = len(self._sorted)
+        if n == 0:
+            return None
+        mid = n // 2
+        median = self._sorted[mid] if n % 2 else (self._sorted[mid - 1] + self._sorted[mid]) / 2
+        deviations = sorted(abs(v - median) for v in self._sorted)
+        mad = deviations[mid] if n % 2 else (deviations[mid - 1] + deviations[mid]) / 2
+        sigma = MAD_TO_SIGMA * mad
+
+        if sigma > 0:
+            inliers = [v for v in self._sorted if abs(v - median) <= self.threshold * sigma]
+        else:
+            inliers = self._sorted
+        mean = sum(inliers) / len(inliers)
+        return FilterEstimate(mean, sigma / math.sqrt(len(inliers)))
+
+
+class KalmanFilter1D:
+    """
+    One-dimensional Kalman filter for a slowly changing level.
+
+    Measurements whose innovation exceeds gate * sqrt(S) are treated as
+    spikes and skipped. If max_rejections of them arrive in a row the load
+    really changed (a super was added, an inspection started) and the
+    filter restarts from the new level instead of crawling towards it.
+    """
+
+    def __init__(self, process_variance=25.0, measurement_variance=40000.0,
+                 gate=4.0, max_rejections=5):
+        """
+        Args:
+            process_variance: Expected variance of the true level change per sample (raw counts²)
+            measurement_variance: Variance of a single raw measurement (raw counts²)
+            gate: Innovation gate in standard deviations
+            max_rejections: Consecutive gated samples that force a restart
+        """
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self.gate = gate
+        self.max_rejections = max_rejections
+        self.reset()
+
+    def reset(self):
+        self._x = None
+        self._p = None
+        self._rejections = 0
+
+    def update(self, value):
+        """Add one raw sample and return the current FilterEstimate."""
+        value = float(value)
+        if self._x is None:
+            self._x = value
+            self._p = self.measurement_variance
+            return self.estimate()
+
+        p_pred = self._p + self.process_variance
+        s = p_pred + self.measurement_variance
+        innovation = value - self._x
+
+        if abs(innovation) > self.gate * math.sqrt(s):
+            self._rejections += 1
+            if self._rejections >= self.max_rejections:
+                self._x = value
+                self._p = self.measurement_variance
+                self._rejections = 0
+            else:
+                self._p = p_pred
+            return self.estimate()
+
+        self._rejections = 0
+        gain = p_pred / s
+        self._x += gain * innovation
+        self._p = (1 - gain) * p_pred
+        return self.estimate()
+
+    def estimate(self):
+        """Current FilterEstimate, or None before the first sample."""
+        if self._x is None:
+            return None
+        return FilterEstimate(self._x, math.sqrt(self._p))
+
+
+def create_filter(kind, **options):
+    """
+    Build a weight filter by name.
+
+    Args:
+        kind: 'median' (rolling median/MAD) or 'kalman'
+        options: Keyword arguments for the filter class
+    """
+    if kind == 'median':
+        return RollingMedianFilter(**options)
+    if kind == 'kalman':
+        return KalmanFilter1D(**options)
+    raise ValueError(f"Unknown weight filter: {kind}")
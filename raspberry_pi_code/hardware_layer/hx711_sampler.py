@@ -0,0 +1,178 @@
+# raspberry_pi_code/hardware_layer/hx711_sampler.py
+
+import time
+import threading
+from typing import Optional
+import numpy as np
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+
+class HX711Sampler:
+    """
+    Long-lived background reader for the HX711.
+
+    A single daemon thread calls hx.get_raw_data continuously and stores every
+    raw ADC count in a fixed-size ring buffer. Readers never touch the GPIO
+    lines themselves; they query the most recent window of samples instead.
+    If the chip hangs, only this one thread is blocked and the condition is
+    detected from the age of the newest sample.
+    """
+
+    def __init__(self, hx, buffer_size: int = 256, samples_per_read: int = 1,
+                 interval: float = 0.1, stall_timeout: float = 3.0, sample_filter=None,
+                 archive=None):
+        """
+        Args:
+            hx: Initialized HX711 driver object
+            buffer_size: Number of raw samples kept in the ring buffer
+            samples_per_read: Samples requested from the driver per call
+            interval: Pause between driver calls in seconds
+            stall_timeout: Age in seconds after which the newest sample counts as stale
+            sample_filter: Optional streaming filter (see filters.py) updated with every sample
+            archive: Optional SampleArchive (see sample_archive.py) every raw sample is appended to
+        """
+        self.hx = hx
+        self.buffer_size = buffer_size
+        self.samples_per_read = samples_per_read
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self.sample_filter = sample_filter
+        self.archive = archive
+        self._estimate = None
+
+        self._values = np.zeros(buffer_size, dtype=np.float64)
+        self._times = np.zeros(buffer_size, dtype=np.float64)
+        self._count = 0  # Total number of samples written since start
+        self._last_sample_time: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._stall_reported = False
+
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --------------------------------------------------------
+    # Thread control
+    # --------------------------------------------------------
+    def start(self):
+        """Start the sampling thread if it is not already running."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="hx711-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Ask the sampling thread to finish and wait briefly for it."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+        if self.archive is not None:
+            self.archive.close()
+
+    def _run(self):
+        error_reported = False
+        while not self._stop_event.is_set():
+            try:
+                readings = self.hx.get_raw_data(times=self.samples_per_read)
+                # The driver reports failed conversions as False
+                values = [r for r in (readings or []) if r is not False and r is not None]
+                if values:
+                    self._append(values)
+                    error_reported = False
+            except Exception as e:
+                # Log a failure streak once instead of once per attempt
+                if not error_reported:
+                    log_error_to_file("ERR_WEIGHT", f"Error reading from HX711: {str(e)}")
+                    error_reported = True
+            self._stop_event.wait(self.interval)
+
+    def _append(self, values):
+        now = time.monotonic()
+        with self._cond:
+            for value in values:
+                index = self._count % self.buffer_size
+                self._values[index] = value
+                self._times[index] = now
+                self._count += 1
+                if self.sample_filter is not None:
+                    self._estimate = self.sample_filter.update(value)
+            self._last_sample_time = now
+            self._stall_reported = False
+            self._cond.notify_all()
+        if self.archive is not None:
+            self.archive.append(values)
+
+    # --------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------
+    @property
+    def sample_count(self) -> int:
+        """Total number of samples collected since the sampler started."""
+        return self._count
+
+    def is_stalled(self) -> bool:
+        """True if no sample arrived within stall_timeout (or none at all yet)."""
+        last = self._last_sample_time
+        if last is None:
+            # Give the chip stall_timeout seconds after start to deliver a first sample
+            if self._started_at is None:
+                return False
+            last = self._started_at
+        return time.monotonic() - last > self.stall_timeout
+
+    def check_stalled(self) -> bool:
+        """
+        Like is_stalled, but logs ERR_HX711_STALLED once per stall
+        instead of on every query.
+        """
+        stalled = self.is_stalled()
+        if stalled and not self._stall_reported:
+            self._stall_reported = True
+            log_error_to_file("ERR_HX711_STALLED",
+                              f"No HX711 sample for more than {self.stall_timeout} seconds")
+        return stalled
+
+    def estimate(self):
+        """Latest FilterEstimate from the sample filter (None without a filter or samples)."""
+        return self._estimate
+
+    def _window(self, start: int, end: int) -> np.ndarray:
+        indices = np.arange(start, end) % self.buffer_size
+        return self._values[indices]
+
+    def latest(self, n: int, max_age: Optional[float] = None) -> np.ndarray:
+        """
+        Return up to n of the most recent raw samples, oldest first.
+
+        Args:
+            n: Window size (capped at the buffer size)
+            max_age: If given, samples older than this many seconds are left out
+        """
+        with self._cond:
+            n = min(n, self._count, self.buffer_size)
+            start = self._count - n
+            values = self._window(start, self._count)
+            if max_age is not None and n:
+                times = self._times[np.arange(start, self._count) % self.buffer_size]
+                values = values[times >= time.monotonic() - max_age]
+            return values.copy()
+
+    def wait_for_samples(self, n: int, timeout: float) -> np.ndarray:
+        """
+        Block until n new samples have been collected (or timeout expires)
+        and return the new samples, oldest first.
+        """
+        n = min(n, self.buffer_size)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            start = self._count
+            while self._count - start < n:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            end = min(self._count, start + n)
+            start = max(start, self._count - self.buffer_size)
+            return self._window(start, end).copy()
@@ -0,0 +1,92 @@
+# raspberry_pi_code/hardware_layer/registry.py
+
+import time
+import threading
+from typing import Any, Callable, Dict, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+
+class SensorRegistry:
+    """
+    Creates hardware devices on first use instead of at import time.
+
+    Each device is registered with a factory function. The first call to
+    get() runs the factory, records how long it took and caches the result.
+    A failed initialization is logged once and cached as None, so callers
+    see the same "sensor not available" behaviour as before without
+    retrying the slow start-up on every read.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._error_codes: Dict[str, str] = {}
+        self._devices: Dict[str, Any] = {}
+        self.init_times: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any], error_code: str = "ERR_SENSOR_INIT"):
+        """
+        Register a device factory.
+
+        Args:
+            name: Device name used with get()
+            factory: Callable that initializes and returns the device
+            error_code: Error code logged if the factory raises
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._error_codes[name] = error_code
+            self._devices.pop(name, None)
+            self.init_times.pop(name, None)
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the device, initializing it on first use. None if it failed to initialize."""
+        if name in self._devices:
+            return self._devices[name]
+
+        with self._lock:
+            # Another thread may have finished the initialization meanwhile
+            if name in self._devices:
+                return self._devices[name]
+
+            start = time.monotonic()
+            try:
+                device = self._factories[name]()
+            except Exception as e:
+                device = None
+                log_error_to_file(self._error_codes[name], str(e))
+                print(f"Error initializing {name}: {str(e)}")
+            self.init_times[name] = time.monotonic() - start
+            self._devices[name] = device
+            return device
+
+    def is_registered(self, name: str) -> bool:
+        """True if a factory is registered under the name."""
+        return name in self._factories
+
+    def is_initialized(self, name: str) -> bool:
+        """True if the device has been created (successfully or not)."""
+        return name in self._devices
+
+    def initialize_all(self) -> Dict[str, float]:
+        """Initialize every registered device now and return the init times in seconds."""
+        for name in list(self._factories):
+            self.get(name)
+        return dict(self.init_times)
+
+    def initialized_devices(self) -> Dict[str, Any]:
+        """Devices created so far that initialized successfully."""
+        return {name: device for name, device in self._devices.items() if device is not None}
+
+    def reset(self):
+        """Forget all created devices so the next get() initializes them again."""
+        with self._lock:
+            self._devices.clear()
+            self.init_times.clear()
+
+    def clear(self):
+        """Forget all factories and devices."""
+        with self._lock:
+            self.reset()
+            self._factories.clear()
+            self._error_codes.clear()
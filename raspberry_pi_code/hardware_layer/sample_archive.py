@@ -0,0 +1,180 @@
+# raspberry_pi_code/hardware_layer/sample_archive.py
+#
+# Archive of raw HX711 samples for later analysis (noise, drift, bee traffic).
+# Samples are stored as fixed-width binary records, one file per UTC day, so
+# a file can be opened with numpy.memmap without any parsing:
+#
+#     samples = np.memmap(path, dtype=SAMPLE_DTYPE, mode='r')
+#     samples['time'], samples['count']
+
+import os
+import glob
+import calendar
+import time
+import threading
+from typing import List, Optional
+import numpy as np
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+SAMPLE_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'hx711')
+
+# time: time.time() of the driver call, count: raw 24-bit ADC count (12 bytes per sample)
+SAMPLE_DTYPE = np.dtype([('time', '<f8'), ('count', '<i4')])
+
+
+class SampleArchive:
+    """
+    Appends raw samples to daily binary files.
+
+    Samples are collected in a preallocated record buffer and written in one
+    block when it is full or flush_interval seconds have passed, so the cost
+    per sample is two array stores. A power loss can at most lose the
+    unwritten buffer; a partially written record at the end of a file is
+    ignored by open_archive().
+    """
+
+    def __init__(self, name: str, directory: str = SAMPLE_ARCHIVE_DIR,
+                 buffer_size: int = 1024, flush_interval: float = 10.0,
+                 max_days: Optional[int] = None):
+        """
+        Args:
+            name: File name prefix, e.g. the hive name
+            directory: Directory of the daily files (created if missing)
+            buffer_size: Samples buffered before a write
+            flush_interval: Most seconds a sample stays in the buffer
+            max_days: Daily files kept (None keeps all, 0 keeps none and
+                removes the existing files)
+        """
+        if max_days is not None and max_days < 0:
+            raise ValueError(f"max_days must not be negative: {max_days}")
+        self.name = name
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_days = max_days
+        self.written = 0   # Samples written since start
+
+        self._buffer = np.zeros(buffer_size, dtype=SAMPLE_DTYPE)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._day: Optional[str] = None
+        self._pruned = False
+        self._lock = threading.Lock()
+
+    def path(self, day: str) -> str:
+        """File of one UTC day ('YYYYMMDD')."""
+        return os.path.join(self.directory, f"{self.name}_{day}.bin")
+
+    def append(self, counts, timestamp: Optional[float] = None):
+        """
+        Add raw counts read at the same time.
+
+        Args:
+            counts: Raw ADC counts
+            timestamp: time.time() of the read (default: now)
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for count in counts:
+                if self._pending == len(self._buffer):
+                    self._flush()
+                self._buffer[self._pending] = (timestamp, count)
+                self._pending += 1
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        if self.max_days == 0:
+            # Nothing is kept: drop the samples and the files of earlier runs
+            if not self._pruned:
+                self._prune()
+                self._pruned = True
+            self._pending = 0
+            return
+        records = self._buffer[:self._pending]
+        try:
+            # A buffer spanning midnight (UTC) is split over the daily files
+            days = (records['time'] // 86400).astype(np.int64)
+            for day in np.unique(days):
+                self._write(time.strftime('%Y%m%d', time.gmtime(day * 86400)), records[days == day])
+            self.written += self._pending
+        except OSError as e:
+            log_error_to_file("ERR_SAMPLE_ARCHIVE", str(e))
+        self._pending = 0
+
+    def _write(self, day: str, records: np.ndarray):
+        if day != self._day or self._file is None:
+            self._close_file()
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(self.path(day), 'ab')
+            # Drop a record cut short by a power loss, so new records stay aligned
+            partial = self._file.tell() % SAMPLE_DTYPE.itemsize
+            if partial:
+                self._file.truncate(self._file.tell() - partial)
+                self._file.seek(0, os.SEEK_END)
+            self._day = day
+            self._prune()
+        self._file.write(records.tobytes())
+        self._file.flush()
+
+    def _prune(self):
+        if self.max_days is None:
+            return
+        files = archive_files(self.name, self.directory)
+        for path in files[:max(0, len(files) - self.max_days)]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                log_error_to_file("ERR_SAMPLE_ARCHIVE", str(e))
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Write what is buffered and close the file (append() opens it again)."""
+        with self._lock:
+            self._flush()
+            self._close_file()
+
+
+def archive_files(name: str, directory: str = SAMPLE_ARCHIVE_DIR) -> List[str]:
+    """Daily files of an archive, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, f"{name}_" + "[0-9]" * 8 + ".bin")))
+
+
+def open_archive(path: str) -> np.ndarray:
+    """
+    Memory-map a daily file read-only. Only whole records are mapped, and
+    nothing is read from the SD card until the samples are accessed.
+    """
+    records = os.path.getsize(path) // SAMPLE_DTYPE.itemsize
+    if records == 0:
+        return np.zeros(0, dtype=SAMPLE_DTYPE)
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode='r', shape=(records,))
+
+
+def load_samples(name: str, start: float, end: float, directory: str = SAMPLE_ARCHIVE_DIR) -> np.ndarray:
+    """
+    Samples with start <= time < end, copied out of the memory-mapped files.
+    The times are wall-clock stamps and can step back (NTP, RTC), so the
+    samples are selected with a mask rather than a binary search.
+    """
+    parts = []
+    for path in archive_files(name, directory):
+        day = os.path.basename(path)[len(name) + 1:-4]
+        day_start = calendar.timegm(time.strptime(day, '%Y%m%d'))
+        if day_start >= end or day_start + 86400 <= start:
+            continue
+        samples = open_archive(path)
+        times = samples['time']
+        parts.append(samples[(times >= start) & (times < end)])
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=SAMPLE_DTYPE)
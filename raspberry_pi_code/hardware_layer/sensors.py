@@ -1,13 +1,38 @@
 # sensors.py (Using RPi.GPIO and adafruit-circuitpython-dht)
+#
+# Hardware is initialized lazily: importing this module does not touch GPIO,
+# build sensor objects or read the calibration file. Each device is created
+# by the registry on first use (or all at once via initialize_sensors()).
+#
+# The devices come from a backend: 'hardware' (the real drivers) or
+# 'simulated' (hardware_layer/simulated.py), selected with SENSOR_BACKEND in
+# config.py, the BUZZWATCH_SENSOR_BACKEND environment variable or use_backend().
 
-import time
-import RPi.GPIO as GPIO
-import board
-import adafruit_dht
-import json
 import os
-from hx711 import HX711  # Updated import
+import time
+from collections import namedtuple
+import numpy as np
 from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+from BUZZWatch.raspberry_pi_code.hardware_layer.hx711_sampler import HX711Sampler
+from BUZZWatch.raspberry_pi_code.hardware_layer.sample_archive import SampleArchive
+from BUZZWatch.raspberry_pi_code.hardware_layer.registry import SensorRegistry
+from BUZZWatch.raspberry_pi_code.hardware_layer.dht_scheduler import DHTScheduler
+from BUZZWatch.raspberry_pi_code.hardware_layer.filters import create_filter, robust_mean
+from BUZZWatch.raspberry_pi_code.hardware_layer.simulated import (
+    SimulatedGPIO,
+    SimulatedDHT22,
+    SimulatedHX711,
+    load_trace
+)
+from BUZZWatch.raspberry_pi_code.hardware_layer.calibration import (
+    CALIBRATION_FILE,
+    load_calibration,
+    save_calibration,
+    fit_calibration_model,
+    CalibrationModel,
+    is_calibrated
+)
+from BUZZWatch.raspberry_pi_code import config
 from BUZZWatch.raspberry_pi_code.config import (
     INDOOR_DHT22_PIN,
     OUTDOOR_DHT22_PIN,
@@ -15,33 +40,64 @@ from BUZZWatch.raspberry_pi_code.config import (
     HX711_SCK_PIN
 )
 
-# Define path for calibration data
-CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'hx711_calibration.json')
+# HX711 background sampling
+HX711_BUFFER_SIZE = 256      # Raw samples kept in the ring buffer
+HX711_WEIGHT_WINDOW = 5      # Samples the filter needs before the first weight reading
+HX711_STALL_TIMEOUT = 3.0    # Seconds without a new sample before the chip counts as hung
+HX711_FILTER = getattr(config, 'HX711_FILTER', 'median')  # Streaming weight filter: 'median' or 'kalman'
+HX711_SAMPLE_INTERVAL = getattr(config, 'HX711_SAMPLE_INTERVAL', 0.1)  # Seconds between driver calls
+HX711_ARCHIVE = getattr(config, 'HX711_ARCHIVE', False)               # Keep every raw sample on disk
+HX711_ARCHIVE_DAYS = getattr(config, 'HX711_ARCHIVE_DAYS', None)      # Daily archive files kept (None: all)
 
-# Initialize GPIO
-GPIO.setmode(GPIO.BCM)
-GPIO.setwarnings(False)
+# DHT22 read scheduling
+DHT22_MIN_PERIOD = 2.0                                       # The sensor measures at most every 2 seconds
+DHT22_CACHE_TTL = getattr(config, 'DHT22_CACHE_TTL', 120.0)  # Max age of a cached sample in seconds
 
-# --------------------------------------------------------
-# DHT22 (Using CircuitPython) - Indoor and Outdoor sensors
-# --------------------------------------------------------
-try:
-    # Initialize DHT22 sensors
-    dht22_indoor = adafruit_dht.DHT22(getattr(board, f'D{INDOOR_DHT22_PIN}'))
-    dht22_outdoor = adafruit_dht.DHT22(getattr(board, f'D{OUTDOOR_DHT22_PIN}'))
-    print(f"DHT22 sensors configured: Indoor(GPIO{INDOOR_DHT22_PIN}), Outdoor(GPIO{OUTDOOR_DHT22_PIN})")
-except Exception as e:
-    dht22_indoor = None
-    dht22_outdoor = None
-    log_error_to_file("ERR_DHT22_INIT", str(e))
-    print(f"Error initializing DHT22 sensors: {str(e)}")
+SENSOR_BACKEND = os.environ.get('BUZZWATCH_SENSOR_BACKEND', getattr(config, 'SENSOR_BACKEND', 'hardware'))
+
+# weight and its 1-sigma uncertainty, both in kg or both in g
+WeightEstimate = namedtuple('WeightEstimate', ['weight', 'stderr'])
+
+DEFAULT_HIVE = 'hive1'
+
+registry = SensorRegistry()
+dht_scheduler = DHTScheduler(min_period=DHT22_MIN_PERIOD, ttl=DHT22_CACHE_TTL)
 
 # --------------------------------------------------------
-# HX711 - Weight Sensor
+# Device factories (hardware backend)
 # --------------------------------------------------------
-try:
-    # Initialize HX711
-    hx = HX711(dout_pin=HX711_DOUT_PIN, pd_sck_pin=HX711_SCK_PIN)
+def _init_gpio():
+    """Initialize GPIO"""
+    import RPi.GPIO as GPIO
+    GPIO.setmode(GPIO.BCM)
+    GPIO.setwarnings(False)
+    return GPIO
+
+def _init_dht22(pin):
+    """Initialize a DHT22 (Using CircuitPython) on the given GPIO pin."""
+    import board
+    import adafruit_dht
+    registry.get('gpio')
+    sensor = adafruit_dht.DHT22(getattr(board, f'D{pin}'))
+    print(f"DHT22 sensor configured: GPIO{pin}")
+    return sensor
+
+def _init_hx711(dout_pin, sck_pin, driver=None):
+    """
+    Initialize the HX711 - Weight Sensor.
+    
+    Args:
+        dout_pin: GPIO pin connected to DOUT
+        sck_pin: GPIO pin connected to PD_SCK
+        driver: Already constructed driver (simulated backend); the real
+            hx711.HX711 is created when omitted
+    """
+    registry.get('gpio')
+    if driver is None:
+        from hx711 import HX711
+        hx = HX711(dout_pin=dout_pin, pd_sck_pin=sck_pin)
+    else:
+        hx = driver
     
     # Reset scale
     hx.reset()
@@ -50,104 +106,297 @@ try:
     hx.channel = 'A'  # Most load cell setups use channel A
     hx.channel_a_gain = 128  # Common gain setting for load cells
     
-    # Reference value for calibration - will be loaded from file if available
-    REFERENCE_UNIT = 1  # Default value
-    ZERO_OFFSET = 0  # Default zero offset
+    print(f"HX711 sensor initialized: DOUT(GPIO{dout_pin}), SCK(GPIO{sck_pin})")
+    return hx
+
+def _init_hx711_sampler(hx_key, archive_name=None):
+    """
+    Start the long-lived sampler that owns the HX711 from here on.
+    
+    Args:
+        hx_key: Registry key of the HX711 driver
+        archive_name: If given, every raw sample is also archived under this name
+    """
+    hx = registry.get(hx_key)
+    if hx is None:
+        raise RuntimeError("HX711 not initialized")
+    archive = SampleArchive(archive_name, max_days=HX711_ARCHIVE_DAYS) if archive_name else None
+    sampler = HX711Sampler(hx, buffer_size=HX711_BUFFER_SIZE, interval=HX711_SAMPLE_INTERVAL,
+                           stall_timeout=HX711_STALL_TIMEOUT,
+                           sample_filter=create_filter(HX711_FILTER), archive=archive)
+    sampler.start()
+    return sampler
+
+# --------------------------------------------------------
+# Hives
+# --------------------------------------------------------
+# name -> hive definition; the first one is the default hive
+hives = {}
+
+def _hive_definitions():
+    """Hive definitions from config.HIVES, or a single hive built from the pin settings."""
+    definitions = getattr(config, 'HIVES', None)
+    if definitions:
+        return definitions
+    return [{
+        'name': DEFAULT_HIVE,
+        'indoor_dht22_pin': INDOOR_DHT22_PIN,
+        'outdoor_dht22_pin': OUTDOOR_DHT22_PIN,
+        'hx711_dout_pin': HX711_DOUT_PIN,
+        'hx711_sck_pin': HX711_SCK_PIN
+    }]
+
+def configure_hives(definitions):
+    """
+    Set up the hives driven by this process.
+    Devices that were already initialized are cleaned up first.
+    
+    Args:
+        definitions: List of dicts with 'name', 'indoor_dht22_pin',
+            'outdoor_dht22_pin', 'hx711_dout_pin', 'hx711_sck_pin' and
+            optionally 'calibration_file' and 'thingspeak_api_key'.
+            A sensor pin used by several hives (e.g. one outdoor DHT22
+            for the whole apiary) is read through one shared device.
+    """
+    if registry.initialized_devices():
+        cleanup()
+    hives.clear()
+    _calibrations.clear()
+    _calibration_models.clear()
+    
+    for index, definition in enumerate(definitions):
+        hive = dict(definition)
+        name = hive.setdefault('name', f"hive{index + 1}")
+        if name in hives:
+            raise ValueError(f"Duplicate hive name: {name}")
+        if not hive.get('calibration_file'):
+            # The first hive keeps the single-hive calibration file
+            hive['calibration_file'] = CALIBRATION_FILE if index == 0 else os.path.join(
+                os.path.dirname(CALIBRATION_FILE), f"hx711_calibration_{name}.json")
+        
+        devices = {}
+        for role, pin_key in (('dht22_indoor', 'indoor_dht22_pin'), ('dht22_outdoor', 'outdoor_dht22_pin')):
+            if hive.get(pin_key) is not None:
+                devices[role] = f"dht22@GPIO{hive[pin_key]}"
+        if hive.get('hx711_dout_pin') is not None:
+            devices['hx711'] = f"hx711@GPIO{hive['hx711_dout_pin']}"
+            devices['hx711_sampler'] = f"hx711_sampler@GPIO{hive['hx711_dout_pin']}"
+        hive['devices'] = devices
+        hives[name] = hive
+    
+    _register_devices()
+
+def get_hive(hive=None):
+    """Return the definition of the named hive (the default hive if None)."""
+    if hive is None:
+        return next(iter(hives.values()))
+    if hive not in hives:
+        raise ValueError(f"Unknown hive: {hive}")
+    return hives[hive]
+
+def _device(hive, role):
+    """The initialized device for a hive role, or None."""
+    key = get_hive(hive)['devices'].get(role)
+    return registry.get(key) if key else None
+
+def _hive_message(hive, message):
+    """Prefix error messages with the hive name when several hives are configured."""
+    if len(hives) > 1:
+        return f"{get_hive(hive)['name']}: {message}"
+    return message
+
+# --------------------------------------------------------
+# Backend selection
+# --------------------------------------------------------
+_backend = {}
+
+def _register_devices():
+    """Register a factory for every device used by the configured hives."""
+    registry.clear()
+    backend = _backend['name']
+    seed = _backend['seed']
+    device_options = _backend['options']
+    trace = _backend['trace']
+    
+    def seeded(offset):
+        return None if seed is None else seed + offset
     
-    # Load calibration data if exists
-    if os.path.exists(CALIBRATION_FILE):
-        try:
-            with open(CALIBRATION_FILE, 'r') as f:
-                calibration_data = json.load(f)
-                REFERENCE_UNIT = calibration_data.get('reference_unit', 1)
-                ZERO_OFFSET = calibration_data.get('zero_offset', 0)
-                print(f"Loaded HX711 calibration: reference_unit={REFERENCE_UNIT}, zero_offset={ZERO_OFFSET}")
-        except Exception as e:
-            log_error_to_file("ERR_HX711_CALIBRATION_LOAD", str(e))
-            print(f"Error loading HX711 calibration: {str(e)}")
+    if backend == 'hardware':
+        registry.register('gpio', _init_gpio, "ERR_GPIO_INIT")
     else:
-        print("No HX711 calibration file found. Using default values.")
+        registry.register('gpio', SimulatedGPIO, "ERR_GPIO_INIT")
     
-    print(f"HX711 sensor initialized: DOUT(GPIO{HX711_DOUT_PIN}), SCK(GPIO{HX711_SCK_PIN})")
-except Exception as e:
-    hx = None
-    log_error_to_file("ERR_HX711_INIT", str(e))
-    print(f"Error initializing HX711 sensor: {str(e)}")
+    for hive in hives.values():
+        devices = hive['devices']
+        for role, pin in (('dht22_indoor', hive.get('indoor_dht22_pin')),
+                          ('dht22_outdoor', hive.get('outdoor_dht22_pin'))):
+            key = devices.get(role)
+            if key is None or registry.is_registered(key):
+                continue
+            if backend == 'hardware':
+                factory = lambda pin=pin: _init_dht22(pin)
+            else:
+                if role == 'dht22_indoor':
+                    options = dict(base_temperature=34.5, daily_swing=0.5, base_humidity=60.0)
+                else:
+                    options = dict(base_temperature=18.0, daily_swing=6.0, base_humidity=65.0)
+                options.update(device_options.get(role, {}))
+                factory = lambda pin=pin, role=role, options=options: SimulatedDHT22(
+                    seed=seeded(pin), trace=trace, trace_prefix=role.split('_')[1], **options)
+            registry.register(key, factory, "ERR_DHT22_INIT")
+        
+        hx_key = devices.get('hx711')
+        if hx_key is None or registry.is_registered(hx_key):
+            continue
+        dout, sck = hive['hx711_dout_pin'], hive['hx711_sck_pin']
+        if backend == 'hardware':
+            factory = lambda dout=dout, sck=sck: _init_hx711(dout, sck)
+        else:
+            factory = lambda dout=dout, sck=sck: _init_hx711(dout, sck, SimulatedHX711(
+                seed=seeded(dout), trace=trace, **device_options.get('hx711', {})))
+        registry.register(hx_key, factory, "ERR_HX711_INIT")
+        archive_name = hive['name'] if HX711_ARCHIVE else None
+        registry.register(devices['hx711_sampler'],
+                          lambda hx_key=hx_key, archive_name=archive_name: _init_hx711_sampler(hx_key, archive_name),
+                          "ERR_HX711_INIT")
+
+def use_backend(backend, seed=None, trace_file=None, **device_options):
+    """
+    Select where the sensor devices come from.
+    Devices that were already initialized are cleaned up first.
+    
+    Args:
+        backend: 'hardware' for the real drivers or 'simulated'
+        seed: Random seed for the simulated devices
+        trace_file: Optional CSV/JSONL trace replayed by the simulated devices
+        device_options: Extra keyword arguments per simulated device, e.g.
+            hx711={'hang_rate': 0.01}, dht22_indoor={'dropout_rate': 0.3}
+    """
+    global SENSOR_BACKEND
+    
+    if backend not in ('hardware', 'simulated'):
+        raise ValueError(f"Unknown sensor backend: {backend}")
+    if registry.initialized_devices():
+        cleanup()
+    
+    _backend.update(
+        name=backend,
+        seed=seed,
+        trace=load_trace(trace_file) if backend == 'simulated' and trace_file else None,
+        options=device_options
+    )
+    SENSOR_BACKEND = backend
+    _register_devices()
+
+def initialize_sensors():
+    """
+    Initialize all sensors now instead of on first use.
+    
+    Returns:
+        dict: Initialization time in seconds per device
+    """
+    init_times = registry.initialize_all()
+    for name, elapsed in init_times.items():
+        status = "ok" if registry.get(name) is not None else "FAILED"
+        print(f"  {name}: {elapsed * 1000:.0f} ms ({status})")
+    return init_times
+
+# --------------------------------------------------------
+# Calibration state (loaded on first use, no hardware needed)
+# --------------------------------------------------------
+_calibrations = {}
+_calibration_models = {}
+
+def get_calibration(hive=None):
+    """Return the active HX711 calibration of a hive, loading it from file on first use."""
+    definition = get_hive(hive)
+    name = definition['name']
+    if name not in _calibrations:
+        _calibrations[name] = load_calibration(definition['calibration_file'])
+    return _calibrations[name]
+
+def get_calibration_model(hive=None):
+    """Return the precomputed raw-to-weight evaluator for a hive's active calibration."""
+    name = get_hive(hive)['name']
+    if name not in _calibration_models:
+        _calibration_models[name] = CalibrationModel.from_calibration(get_calibration(hive))
+    return _calibration_models[name]
+
+def _set_calibration(calibration_data, hive=None):
+    """Save new calibration data and make it the hive's active calibration."""
+    definition = get_hive(hive)
+    save_calibration(calibration_data, definition['calibration_file'])
+    _calibrations[definition['name']] = calibration_data
+    _calibration_models.pop(definition['name'], None)
+
+# Legacy module attributes of the default hive, resolved lazily (PEP 562)
+_LAZY_DEVICES = {
+    'dht22_indoor': 'dht22_indoor',
+    'dht22_outdoor': 'dht22_outdoor',
+    'hx': 'hx711',
+    'hx_sampler': 'hx711_sampler',
+}
+
+def __getattr__(name):
+    if name in _LAZY_DEVICES:
+        return _device(None, _LAZY_DEVICES[name])
+    if name == 'REFERENCE_UNIT':
+        return get_calibration()['reference_unit']
+    if name == 'ZERO_OFFSET':
+        return get_calibration()['zero_offset']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+use_backend(SENSOR_BACKEND,
+            seed=getattr(config, 'SIMULATION_SEED', None),
+            trace_file=getattr(config, 'SIMULATION_TRACE_FILE', None))
+configure_hives(_hive_definitions())
+
 
 # --------------------------------------------------------
 # Calibration Functions
 # --------------------------------------------------------
-def calibrate_hx711(known_weight_value):
+def calibrate_hx711(known_weight_value, hive=None):
     """
     Calibrate the HX711 sensor with a known weight.
-    Saves calibration data to a JSON file.
+    Saves calibration data to the hive's calibration JSON file.
     
     Args:
         known_weight_value: The known weight value in your preferred units (e.g., grams)
+        hive: Hive name (default hive if None)
         
     Returns:
         tuple: (success, message)
     """
-    global REFERENCE_UNIT, ZERO_OFFSET
-    
-    if not hx:
+    if not _device(hive, 'hx711_sampler'):
         return False, "HX711 not initialized"
     
     try:
         # Step 1: Get zero reading (tare)
         print("Measuring zero weight... please ensure scale is empty")
-        zero_readings = []
-        for _ in range(10):
-            try:
-                readings = hx.get_raw_data(times=5)
-                if readings:
-                    zero_readings.extend(readings)
-            except Exception as e:
-                print(f"Error during zero reading: {e}")
-            time.sleep(0.1)
+        zero_readings = read_raw_samples(50, hive=hive)
         
-        if not zero_readings:
+        if len(zero_readings) == 0:
             return False, "Failed to get zero readings"
         
         # Calculate average zero reading (after removing outliers)
-        zero_readings.sort()
-        if len(zero_readings) > 4:
-            # Remove extreme values
-            zero_readings = zero_readings[2:-2]
-        zero_offset = sum(zero_readings) / len(zero_readings)
+        zero_offset = robust_mean(zero_readings).value
         
         # Step 2: Get reading with known weight
         print(f"Please place a known weight of {known_weight_value} on the scale")
         time.sleep(2)  # Give user time to place the weight
         print("Measuring weight...")
         
-        weight_readings = []
-        for _ in range(10):
-            try:
-                readings = hx.get_raw_data(times=5)
-                if readings:
-                    weight_readings.extend(readings)
-            except Exception as e:
-                print(f"Error during weight reading: {e}")
-            time.sleep(0.1)
+        weight_readings = read_raw_samples(50, hive=hive)
         
-        if not weight_readings:
+        if len(weight_readings) == 0:
             return False, "Failed to get weight readings"
         
         # Calculate average weight reading (after removing outliers)
-        weight_readings.sort()
-        if len(weight_readings) > 4:
-            # Remove extreme values
-            weight_readings = weight_readings[2:-2]
-        weight_value = sum(weight_readings) / len(weight_readings)
+        weight_value = robust_mean(weight_readings).value
         
         # Calculate reference unit
         reference_unit = (weight_value - zero_offset) / known_weight_value
         
-        # Update global values
-        ZERO_OFFSET = zero_offset
-        REFERENCE_UNIT = reference_unit
-        
         # Save calibration to file
         calibration_data = {
             'reference_unit': reference_unit,
@@ -155,12 +404,7 @@ def calibrate_hx711(known_weight_value):
             'calibration_date': time.strftime('%Y-%m-%d %H:%M:%S'),
             'known_weight_used': known_weight_value
         }
-        
-        # Ensure config directory exists
-        os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
-        
-        with open(CALIBRATION_FILE, 'w') as f:
-            json.dump(calibration_data, f, indent=4)
+        _set_calibration(calibration_data, hive)
         
         return True, f"Calibration successful. Reference unit: {reference_unit:.2f}, Zero offset: {zero_offset:.2f}"
     
@@ -169,181 +413,215 @@ def calibrate_hx711(known_weight_value):
         log_error_to_file("ERR_HX711_CALIBRATION", error_msg)
         return False, error_msg
 
-def is_calibrated():
-    """Check if the HX711 sensor has been calibrated."""
-    return os.path.exists(CALIBRATION_FILE)
+def calibrate_hx711_multipoint(reference_weights, degree=1, samples_per_point=50, wait_for_weight=None,
+                               hive=None):
+    """
+    Calibrate the HX711 sensor with several known weights.
+    Fits weight = p(raw) by least squares (linear or low-order polynomial),
+    which captures load cell non-linearity over the full range of a hive.
+    The model and its residuals are saved to the calibration JSON file.
+    
+    Args:
+        reference_weights: Known weights in your preferred units (e.g., grams);
+            include 0 for the empty scale
+        degree: Polynomial degree of the model (1 = linear)
+        samples_per_point: Raw samples averaged for each reference weight
+        wait_for_weight: Optional callable(weight) that returns once the weight
+            is on the scale; defaults to a 2 second pause
+        hive: Hive name (default hive if None)
+        
+    Returns:
+        tuple: (success, message)
+    """
+    if not _device(hive, 'hx711_sampler'):
+        return False, "HX711 not initialized"
+    
+    try:
+        raw_points = []
+        for weight in reference_weights:
+            print(f"Please place a known weight of {weight} on the scale")
+            if wait_for_weight:
+                wait_for_weight(weight)
+            else:
+                time.sleep(2)  # Give user time to place the weight
+            print("Measuring weight...")
+            
+            readings = read_raw_samples(samples_per_point, hive=hive)
+            if len(readings) == 0:
+                return False, f"Failed to get readings for weight {weight}"
+            raw_points.append(robust_mean(readings).value)
+        
+        model = fit_calibration_model(raw_points, reference_weights, degree)
+        
+        # Keep the linear values for tools that only understand single-point calibration
+        linear = model if degree == 1 else fit_calibration_model(raw_points, reference_weights, 1)
+        linear_model = CalibrationModel.from_calibration({'model': linear})
+        reference_unit = 1.0 / linear_model.slope(0)
+        zero_offset = -linear_model(0.0) * reference_unit
+        
+        calibration_data = {
+            'reference_unit': reference_unit,
+            'zero_offset': zero_offset,
+            'calibration_date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'known_weight_used': max(reference_weights),
+            'model': model,
+            'points': [{'weight': w, 'raw': r} for w, r in zip(reference_weights, raw_points)]
+        }
+        _set_calibration(calibration_data, hive)
+        
+        return True, (f"Calibration successful. Degree {degree} fit over {len(raw_points)} points, "
+                      f"RMS residual: {model['rmse']:.2f}")
+    
+    except Exception as e:
+        error_msg = f"Calibration error: {str(e)}"
+        log_error_to_file("ERR_HX711_CALIBRATION", error_msg)
+        return False, error_msg
 
 # --------------------------------------------------------
 # DHT22 Read Functions
 # --------------------------------------------------------
-def read_dht22_indoor():
-    """
-    Uses CircuitPython to read temperature/humidity from the indoor sensor.
-    Attempts 5 readings with 100ms intervals, averages successful readings.
-    Returns (temp_c, humidity) or (None, None) on error.
+def read_dht22_sample(name, hive=None):
     """
-    if not dht22_indoor:
-        return None, None
+    Read a timestamped sample from a DHT22 through the scheduler.
+    The bus is only touched if the sensor can deliver a new sample
+    (at most every DHT22_MIN_PERIOD seconds); otherwise the last good
+    sample is returned while it is younger than DHT22_CACHE_TTL.
+    A sensor shared by several hives is scheduled once.
+    
+    Args:
+        name: 'dht22_indoor' or 'dht22_outdoor'
+        hive: Hive name (default hive if None)
         
-    successful_temps = []
-    successful_humids = []
+    Returns:
+        DHTSample(temperature, humidity, timestamp) or None on error.
+    """
+    key = get_hive(hive)['devices'].get(name)
+    sensor = registry.get(key) if key else None
+    if not sensor:
+        return None
     
-    for _ in range(5):  # Try 5 times
-        try:
-            temperature = dht22_indoor.temperature
-            humidity = dht22_indoor.humidity
-            
-            if temperature is not None and humidity is not None:
-                successful_temps.append(temperature)
-                successful_humids.append(humidity)
-            
-            time.sleep(0.1)  # 100ms delay between readings
-            
-        except RuntimeError as e:
-            # DHT22 sometimes fails to read, this is normal
-            continue
-        except Exception as e:
-            log_error_to_file("ERR_DHT22_INDOOR", str(e))
-            continue
+    error_code = "ERR_DHT22_INDOOR" if name == 'dht22_indoor' else "ERR_DHT22_OUTDOOR"
+    try:
+        sample = dht_scheduler.read(key, sensor)
+    except Exception as e:
+        log_error_to_file(error_code, _hive_message(hive, str(e)))
+        return None
     
-    # If we have any successful readings, return their average
-    if successful_temps and successful_humids:
-        avg_temp = round(sum(successful_temps) / len(successful_temps), 1)
-        avg_humid = round(sum(successful_humids) / len(successful_humids), 1)
-        return avg_temp, avg_humid
-    else:
-        log_error_to_file("ERR_DHT22_INDOOR", "No valid readings after 5 attempts")
+    if sample is None:
+        log_error_to_file(error_code, _hive_message(
+            hive, f"No valid reading within the last {DHT22_CACHE_TTL} seconds"))
+    return sample
+
+def _read_dht22(name, hive):
+    sample = read_dht22_sample(name, hive)
+    if sample is None:
         return None, None
+    return round(sample.temperature, 1), round(sample.humidity, 1)
+
+def read_dht22_indoor(hive=None):
+    """
+    Uses CircuitPython to read temperature/humidity from the indoor sensor.
+    Returns (temp_c, humidity) or (None, None) on error.
+    """
+    return _read_dht22('dht22_indoor', hive)
 
-def read_dht22_outdoor():
+def read_dht22_outdoor(hive=None):
     """
     Uses CircuitPython to read temperature/humidity from the outdoor sensor.
-    Attempts 5 readings with 100ms intervals, averages successful readings.
     Returns (temp_c, humidity) or (None, None) on error.
     """
-    if not dht22_outdoor:
-        return None, None
-        
-    successful_temps = []
-    successful_humids = []
-    
-    for _ in range(5):  # Try 5 times
-        try:
-            temperature = dht22_outdoor.temperature
-            humidity = dht22_outdoor.humidity
-            
-            if temperature is not None and humidity is not None:
-                successful_temps.append(temperature)
-                successful_humids.append(humidity)
-            
-            time.sleep(0.1)  # 100ms delay between readings
-            
-        except RuntimeError as e:
-            # DHT22 sometimes fails to read, this is normal
-            continue
-        except Exception as e:
-            log_error_to_file("ERR_DHT22_OUTDOOR", str(e))
-            continue
-    
-    # If we have any successful readings, return their average
-    if successful_temps and successful_humids:
-        avg_temp = round(sum(successful_temps) / len(successful_temps), 1)
-        avg_humid = round(sum(successful_humids) / len(successful_humids), 1)
-        return avg_temp, avg_humid
-    else:
-        log_error_to_file("ERR_DHT22_OUTDOOR", "No valid readings after 5 attempts")
-        return None, None
+    return _read_dht22('dht22_outdoor', hive)
 
 # --------------------------------------------------------
 # HX711 (Weight) Read Function
 # --------------------------------------------------------
-def read_weight(return_kg=True):
+def read_raw_samples(count, timeout=None, hive=None):
     """
-    Read weight from HX711 sensor with 4 load cells.
-    Gets multiple raw readings with timeout protection, filters outliers, 
-    and averages remaining values.
-    Applies calibration factor to convert to actual weight.
+    Wait for the next `count` raw HX711 samples from the background sampler.
+    Use this instead of calling hx.get_raw_data directly, which would
+    compete with the sampler for the GPIO lines.
+    
+    Args:
+        count: Number of new samples to collect
+        timeout: Maximum time to wait in seconds (defaults to count * 0.5)
+        hive: Hive name (default hive if None)
+        
+    Returns:
+        numpy array of raw values (may be shorter than count on timeout)
+    """
+    hx_sampler = _device(hive, 'hx711_sampler')
+    if not hx_sampler:
+        return np.array([])
+    if timeout is None:
+        timeout = max(HX711_STALL_TIMEOUT, count * 0.5)
+    return hx_sampler.wait_for_samples(count, timeout)
+
+def read_weight_estimate(return_kg=True, hive=None):
+    """
+    Read the filtered weight together with its uncertainty.
+    The streaming filter (HX711_FILTER) runs on every raw sample in the
+    background sampler, so this is a constant-time lookup.
     
     Args:
         return_kg: If True, returns weight in kilograms, otherwise in grams
+        hive: Hive name (default hive if None)
         
     Returns:
-        Weight value (in kg if return_kg=True, in g if return_kg=False) or None on error.
+        WeightEstimate(weight, stderr) where stderr is the 1-sigma uncertainty
+        in the same unit, or None on error.
     """
-    if not hx:
+    hx_sampler = _device(hive, 'hx711_sampler')
+    if not hx_sampler:
         return None
     
     try:
-        # Add timeout protection for get_raw_data
-        import threading
-        import queue
-
-        result_queue = queue.Queue()
-        
-        def read_with_timeout():
-            try:
-                # Attempt to get raw data
-                readings = hx.get_raw_data(times=5)  # Reduced from 10 to 5 for faster reading
-                result_queue.put(("success", readings))
-            except Exception as e:
-                result_queue.put(("error", str(e)))
-        
-        # Start reading in a separate thread
-        read_thread = threading.Thread(target=read_with_timeout)
-        read_thread.daemon = True
-        read_thread.start()
-        
-        # Wait for the thread to complete or timeout
-        read_thread.join(timeout=3.0)  # 3 second timeout
-        
-        if read_thread.is_alive():
-            # If the thread is still alive after timeout, it's stuck
-            log_error_to_file("ERR_WEIGHT", "Reading from HX711 timed out after 3 seconds")
-            # We can't kill the thread in Python, but we can continue
+        # A hung chip is reported once by the sampler, not on every call
+        if hx_sampler.check_stalled():
             return None
         
-        # Check if we have results
-        if result_queue.empty():
-            log_error_to_file("ERR_WEIGHT", "No data returned from HX711")
-            return None
-        
-        status, raw_readings = result_queue.get()
+        # Right after start-up the filter may not have seen a full window yet
+        missing = HX711_WEIGHT_WINDOW - hx_sampler.sample_count
+        if missing > 0:
+            hx_sampler.wait_for_samples(missing, HX711_STALL_TIMEOUT)
         
-        if status == "error":
-            log_error_to_file("ERR_WEIGHT", f"Error reading from HX711: {raw_readings}")
+        estimate = hx_sampler.estimate()
+        if estimate is None:
+            log_error_to_file("ERR_WEIGHT", _hive_message(hive, "No valid readings obtained"))
             return None
         
-        if not raw_readings or len(raw_readings) == 0:
-            log_error_to_file("ERR_WEIGHT", "No valid readings obtained")
-            return None
-            
-        # Filter out outliers if we have enough readings
-        if len(raw_readings) >= 3:
-            # Sort the readings
-            raw_readings.sort()
-            # Remove the highest and lowest values
-            filtered_readings = raw_readings[1:-1]
-        else:
-            filtered_readings = raw_readings
-        
-        # Calculate average of filtered readings
-        avg_raw_value = sum(filtered_readings) / len(filtered_readings)
-        
-        # Apply calibration factor to get actual weight
-        # Subtract zero offset first, then divide by reference unit
-        weight_g = (avg_raw_value - ZERO_OFFSET) / REFERENCE_UNIT if REFERENCE_UNIT != 0 else 0
+        # Apply the calibration model (single- or multi-point) to get actual weight
+        model = get_calibration_model(hive)
+        weight_g = model(estimate.value)
+        stderr_g = estimate.stderr * abs(model.slope(estimate.value))
         
-        # Convert to kg if requested (with exactly 2 decimal places)
         if return_kg:
-            return round(weight_g / 1000, 2)  # Convert to kg with 2 decimal places
-        else:
-            return round(weight_g, 2)  # Keep in grams with 2 decimal places
+            return WeightEstimate(weight_g / 1000, stderr_g / 1000)
+        return WeightEstimate(weight_g, stderr_g)
         
     except Exception as e:
-        log_error_to_file("ERR_WEIGHT", f"Unexpected error in read_weight: {str(e)}")
+        log_error_to_file("ERR_WEIGHT", _hive_message(hive, f"Unexpected error in read_weight: {str(e)}"))
+        return None
+
+def read_weight(return_kg=True, hive=None):
+    """
+    Read weight from HX711 sensor with 4 load cells.
+    Uses the streaming filter estimate from the background sampler
+    and applies the calibration factor to convert to actual weight.
+    
+    Args:
+        return_kg: If True, returns weight in kilograms, otherwise in grams
+        hive: Hive name (default hive if None)
+        
+    Returns:
+        Weight value (in kg if return_kg=True, in g if return_kg=False) or None on error.
+    """
+    estimate = read_weight_estimate(return_kg, hive)
+    if estimate is None:
         return None
+    # Exactly 2 decimal places in either unit
+    return round(estimate.weight, 2)
 
-def read_weight_for_thingspeak():
+def read_weight_for_thingspeak(hive=None):
     """
     Read weight specifically formatted for ThingSpeak - always in kg with 2 decimal places.
     This is a convenience function for the ThingSpeak integration.
@@ -351,7 +629,7 @@ def read_weight_for_thingspeak():
     Returns:
         Weight in kilograms with 2 decimal places or None on error
     """
-    weight_kg = read_weight(return_kg=True)
+    weight_kg = read_weight(return_kg=True, hive=hive)
     
     # Ensure we have exactly 2 decimal places for ThingSpeak
     if weight_kg is not None:
@@ -363,13 +641,22 @@ def read_weight_for_thingspeak():
 
 def cleanup():
     """
-    Clean up GPIO resources
+    Clean up GPIO resources.
+    Only devices that were actually initialized are released; a device that
+    fails to close is logged and does not keep the others open.
     """
     try:
-        if dht22_indoor:
-            dht22_indoor.exit()
-        if dht22_outdoor:
-            dht22_outdoor.exit()
-        GPIO.cleanup()
-    except:
-        pass
+        devices = registry.initialized_devices()
+        for prefix, close in (('hx711_sampler@', 'stop'), ('dht22@', 'exit')):
+            for name, device in devices.items():
+                if name.startswith(prefix):
+                    try:
+                        getattr(device, close)()
+                    except Exception as e:
+                        log_error_to_file("ERR_CLEANUP", f"{name}: {str(e)}")
+        if 'gpio' in devices:
+            devices['gpio'].cleanup()
+    except Exception as e:
+        log_error_to_file("ERR_CLEANUP", str(e))
+    finally:
+        registry.reset()
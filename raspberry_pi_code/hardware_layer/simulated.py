@@ -0,0 +1,215 @@
+# raspberry_pi_code/hardware_layer/simulated.py
+#
+# Simulated sensor backends. They implement the same interface as the
+# drivers used in sensors.py (adafruit_dht.DHT22, hx711.HX711, RPi.GPIO) so
+# the full pipeline can run on a machine without GPIO. Behaviour is driven
+# either by a seeded random generator or by a recorded trace file.
+
+import os
+import csv
+import json
+import math
+import time
+import random
+from typing import Dict, List, Optional
+
+
+def load_trace(path: str) -> List[Dict[str, float]]:
+    """
+    Load a sensor trace from a CSV (with header) or JSON-lines file.
+
+    Each row may contain any of the columns indoor_temp, indoor_humidity,
+    outdoor_temp, outdoor_humidity and weight_raw. Empty cells are treated
+    as a failed read for that sensor.
+    """
+    rows = []
+    with open(path, 'r') as f:
+        if os.path.splitext(path)[1].lower() in ('.jsonl', '.json'):
+            for line in f:
+                line = line.strip()
+                if line:
+                    rows.append(json.loads(line))
+        else:
+            for row in csv.DictReader(f):
+                rows.append({k: float(v) if v not in ('', None) else None for k, v in row.items()})
+    if not rows:
+        raise ValueError(f"Trace file {path} contains no rows")
+    return rows
+
+
+class _TracePlayer:
+    """Replays one or more columns of a trace, wrapping around at the end."""
+
+    def __init__(self, rows: List[Dict[str, float]]):
+        self.rows = rows
+        self.position = 0
+
+    def next(self) -> Dict[str, float]:
+        row = self.rows[self.position % len(self.rows)]
+        self.position += 1
+        return row
+
+
+class SimulatedGPIO:
+    """Stand-in for RPi.GPIO; only the calls made by sensors.py."""
+
+    BCM = 11
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def cleanup(self):
+        pass
+
+
+class SimulatedDHT22:
+    """
+    Simulated DHT22 with the adafruit_dht.DHT22 interface.
+
+    Temperature follows a daily sine wave plus Gaussian noise. Reads can
+    fail with RuntimeError (like a checksum error on real hardware), take
+    a configurable time, or hang for a long time.
+    """
+
+    def __init__(self, seed: Optional[int] = None,
+                 base_temperature: float = 25.0,
+                 daily_swing: float = 5.0,
+                 base_humidity: float = 60.0,
+                 noise: float = 0.2,
+                 dropout_rate: float = 0.1,
+                 latency: float = 0.25,
+                 hang_rate: float = 0.0,
+                 hang_duration: float = 10.0,
+                 trace: Optional[List[Dict[str, float]]] = None,
+                 trace_prefix: str = 'indoor'):
+        """
+        Args:
+            seed: Random seed for reproducible runs
+            base_temperature: Mean temperature in °C
+            daily_swing: Amplitude of the daily temperature cycle in °C
+            base_humidity: Mean relative humidity in %
+            noise: Standard deviation of the measurement noise
+            dropout_rate: Probability that a read raises RuntimeError
+            latency: Seconds a bus read takes
+            hang_rate: Probability that a read blocks for hang_duration
+            hang_duration: Seconds a hung read blocks
+            trace: Rows from load_trace(); replaces the generated values
+            trace_prefix: Column prefix used from the trace ('indoor' or 'outdoor')
+        """
+        self.rng = random.Random(seed)
+        self.base_temperature = base_temperature
+        self.daily_swing = daily_swing
+        self.base_humidity = base_humidity
+        self.noise = noise
+        self.dropout_rate = dropout_rate
+        self.latency = latency
+        self.hang_rate = hang_rate
+        self.hang_duration = hang_duration
+        self.trace = _TracePlayer(trace) if trace else None
+        self.trace_prefix = trace_prefix
+        self._humidity = None
+
+    def _read(self):
+        if self.hang_rate and self.rng.random() < self.hang_rate:
+            time.sleep(self.hang_duration)
+        time.sleep(self.latency)
+        if self.rng.random() < self.dropout_rate:
+            raise RuntimeError("Checksum did not validate. Try again.")
+
+        if self.trace:
+            row = self.trace.next()
+            temperature = row.get(f'{self.trace_prefix}_temp')
+            humidity = row.get(f'{self.trace_prefix}_humidity')
+            if temperature is None or humidity is None:
+                raise RuntimeError("A full buffer was not returned. Try again.")
+            return temperature, humidity
+
+        phase = 2 * math.pi * (time.time() % 86400) / 86400
+        temperature = self.base_temperature + self.daily_swing * math.sin(phase)
+        humidity = self.base_humidity - 2 * self.daily_swing * math.sin(phase)
+        temperature += self.rng.gauss(0, self.noise)
+        humidity += self.rng.gauss(0, self.noise * 5)
+        return round(temperature, 1), round(min(max(humidity, 0.0), 100.0), 1)
+
+    @property
+    def temperature(self):
+        # Like the real driver, reading temperature triggers a bus read and
+        # humidity returns the value captured by that same read.
+        temperature, self._humidity = self._read()
+        return temperature
+
+    @property
+    def humidity(self):
+        return self._humidity
+
+    def exit(self):
+        pass
+
+
+class SimulatedHX711:
+    """
+    Simulated HX711 with the hx711.HX711 interface used by sensors.py.
+
+    Raw counts are base_raw + counts_per_gram * weight + noise. Individual
+    conversions can fail (reported as False like the real driver) and a
+    whole call can hang to exercise the stall detection.
+    """
+
+    def __init__(self, seed: Optional[int] = None,
+                 base_raw: float = 8_000_000,
+                 counts_per_gram: float = 22.0,
+                 weight_g: float = 35_000.0,
+                 noise: float = 150.0,
+                 samples_per_second: float = 10.0,
+                 dropout_rate: float = 0.02,
+                 hang_rate: float = 0.0,
+                 hang_duration: float = 30.0,
+                 trace: Optional[List[Dict[str, float]]] = None):
+        """
+        Args:
+            seed: Random seed for reproducible runs
+            base_raw: Raw count of the empty scale
+            counts_per_gram: Raw counts per gram of load
+            weight_g: Simulated load in grams
+            noise: Standard deviation of the raw count noise
+            samples_per_second: Conversion rate of the chip (10 or 80 on real hardware)
+            dropout_rate: Probability that a single conversion fails
+            hang_rate: Probability that a get_raw_data call blocks for hang_duration
+            hang_duration: Seconds a hung call blocks
+            trace: Rows from load_trace(); the weight_raw column replaces the generated values
+        """
+        self.rng = random.Random(seed)
+        self.base_raw = base_raw
+        self.counts_per_gram = counts_per_gram
+        self.weight_g = weight_g
+        self.noise = noise
+        self.samples_per_second = samples_per_second
+        self.dropout_rate = dropout_rate
+        self.hang_rate = hang_rate
+        self.hang_duration = hang_duration
+        self.trace = _TracePlayer(trace) if trace else None
+        self.channel = 'A'
+        self.channel_a_gain = 128
+
+    def reset(self):
+        pass
+
+    def _sample(self):
+        if self.rng.random() < self.dropout_rate:
+            return False
+        if self.trace:
+            raw = self.trace.next().get('weight_raw')
+            return False if raw is None else int(raw)
+        return int(self.base_raw + self.counts_per_gram * self.weight_g + self.rng.gauss(0, self.noise))
+
+    def get_raw_data(self, times=5):
+        if self.hang_rate and self.rng.random() < self.hang_rate:
+            time.sleep(self.hang_duration)
+        readings = []
+        for _ in range(times):
+            time.sleep(1.0 / self.samples_per_second)
+            readings.append(self._sample())
+        return readings
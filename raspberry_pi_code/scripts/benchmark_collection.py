@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Collection Benchmark
+--------------------
+Runs the data collection pipeline against the simulated sensor backend and
+reports cycle time, per-sensor read latency and failure counts. No
+Raspberry Pi, GPIO or network connection is needed. With --hives N the
+collector reads N simulated hives that share one outdoor DHT22.
+
+Usage:
+  python benchmark_collection.py [--cycles N] [--seed S] [--trace FILE]
+                                 [--sequential] [--hx711-hang-rate P]
+                                 [--dht-dropout-rate P] [--hives N]
+"""
+
+import sys
+import argparse
+import statistics
+from BUZZWatch.raspberry_pi_code.hardware_layer import sensors
+from BUZZWatch.raspberry_pi_code.data_collection_layer.data_collector import DataCollector
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_benchmark(cycles, parallel, sensor_timeout):
+    """Run the collection cycles and return the collected timings."""
+    collector = DataCollector("benchmark", parallel=parallel, sensor_timeout=sensor_timeout)
+    cycle_times = []
+    latencies = {}
+    failures = {}
+
+    try:
+        for cycle in range(cycles):
+            readings = collector.read_sensors()
+            cycle_times.append(collector.last_cycle_time)
+            for hive, values in readings.items():
+                for sensor, value in values.items():
+                    name = f"{hive}/{sensor}" if len(readings) > 1 else sensor
+                    latencies.setdefault(name, [])
+                    failures.setdefault(name, 0)
+                    if value is None or value == (None, None):
+                        failures[name] += 1
+                    latency = collector.read_latencies.get(name)
+                    if latency is not None:
+                        latencies[name].append(latency)
+            print(f"\rCycle {cycle + 1}/{cycles}", end="")
+        print("")
+    finally:
+        collector.close()
+
+    return cycle_times, latencies, failures
+
+
+def print_report(cycle_times, latencies, failures):
+    print("\n" + "=" * 60)
+    print("  COLLECTION BENCHMARK RESULTS")
+    print("=" * 60)
+    total = sum(cycle_times)
+    print(f"Cycles: {len(cycle_times)} in {total:.2f}s ({len(cycle_times) / total:.2f} cycles/s)")
+    print(f"Cycle time: mean {statistics.mean(cycle_times):.3f}s, "
+          f"p95 {percentile(cycle_times, 0.95):.3f}s, max {max(cycle_times):.3f}s")
+    print("-" * 60)
+    print(f"{'SENSOR':<16}{'MEAN':>10}{'P50':>10}{'P95':>10}{'MAX':>10}{'FAILED':>10}")
+    for name, values in latencies.items():
+        if values:
+            print(f"{name:<16}{statistics.mean(values):>10.3f}{percentile(values, 0.5):>10.3f}"
+                  f"{percentile(values, 0.95):>10.3f}{max(values):>10.3f}{failures[name]:>10}")
+        else:
+            print(f"{name:<16}{'n/a':>10}{'n/a':>10}{'n/a':>10}{'n/a':>10}{failures[name]:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark data collection with simulated sensors")
+    parser.add_argument("--cycles", type=int, default=20, help="Number of collection cycles")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the simulated sensors")
+    parser.add_argument("--trace", help="CSV/JSONL trace file to replay instead of generated values")
+    parser.add_argument("--sequential", action="store_true", help="Read sensors one after another")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-sensor read deadline in seconds")
+    parser.add_argument("--hx711-hang-rate", type=float, default=0.0, help="Probability of an HX711 hang")
+    parser.add_argument("--dht-dropout-rate", type=float, default=0.1, help="Probability of a failed DHT22 read")
+    parser.add_argument("--hives", type=int, default=1, help="Number of simulated hives")
+    args = parser.parse_args()
+
+    dht_options = {'dropout_rate': args.dht_dropout_rate}
+    sensors.use_backend('simulated', seed=args.seed, trace_file=args.trace,
+                        dht22_indoor=dht_options, dht22_outdoor=dht_options,
+                        hx711={'hang_rate': args.hx711_hang_rate})
+    if args.hives > 1:
+        # Simulated pins and keys only need to be distinct; the outdoor DHT22 is shared
+        sensors.configure_hives([
+            {'name': f"hive{i + 1}", 'indoor_dht22_pin': 100 + i, 'outdoor_dht22_pin': 99,
+             'hx711_dout_pin': 200 + i, 'hx711_sck_pin': 300 + i,
+             'thingspeak_api_key': f"SIMULATED_KEY_{i + 1}"}
+            for i in range(args.hives)
+        ])
+
+    try:
+        print("Initializing simulated sensors...")
+        sensors.initialize_sensors()
+        results = run_benchmark(args.cycles, not args.sequential, args.timeout)
+        print_report(*results)
+    except KeyboardInterrupt:
+        print("\nBenchmark interrupted by user.")
+        sys.exit(1)
+    finally:
+        sensors.cleanup()
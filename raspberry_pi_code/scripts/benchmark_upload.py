@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Upload Benchmark
+----------------
+Runs ThingSpeakAPI and the store-and-forward queue against the local mock
+ThingSpeak server and reports upload throughput, request latency, failed
+requests and how long a backlog takes to drain. No network connection is
+needed.
+
+Usage:
+  python benchmark_upload.py [--readings N] [--latency S] [--jitter S]
+                             [--error-rate P] [--update-interval S]
+                             [--bulk] [--retry-interval S] [--seed S]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+from BUZZWatch.raspberry_pi_code.services.api.mock_server import MockThingSpeakServer
+from BUZZWatch.raspberry_pi_code.services.api.thingspeak import ThingSpeakAPI, BULK_MAX_ENTRIES
+from BUZZWatch.raspberry_pi_code.services.upload_queue import UploadQueue, UploadDrainer, UploadTarget
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def reading(index):
+    """A synthetic reading; the values only need to differ."""
+    return {
+        'indoor_temp': 34.0 + (index % 10) / 10,
+        'indoor_humidity': 60.0,
+        'outdoor_temp': 15.0 + (index % 20) / 10,
+        'outdoor_humidity': 70.0,
+        'weight': 40.0 + index / 1000,
+    }
+
+
+def run_direct(server, readings, update_interval):
+    """One upload_data() request per reading, waiting for the rate limit."""
+    api = ThingSpeakAPI("benchmark-direct", server=server.url, update_interval=update_interval)
+    failed = 0
+    start = time.perf_counter()
+    for index in range(readings):
+        if not api.upload_data(wait=True, **reading(index)):
+            failed += 1
+        print(f"\rUpload {index + 1}/{readings}", end="")
+    print("")
+    elapsed = time.perf_counter() - start
+    api.close()
+    return elapsed, list(api.latencies), failed
+
+
+def run_drain(server, readings, update_interval, bulk, retry_interval):
+    """Queue a backlog and measure how long the drainer takes to send it."""
+    api = ThingSpeakAPI("benchmark-drain", server=server.url, update_interval=update_interval,
+                        channel_id="1" if bulk else None)
+
+    def send(batch):
+        if bulk:
+            return api.bulk_upload([dict(r.fields, created_at=r.created_at) for r in batch])
+        return api.upload_data(created_at=batch[0].created_at, wait=True, **batch[0].fields)
+
+    with tempfile.TemporaryDirectory(prefix="buzzwatch-benchmark-") as directory:
+        upload_queue = UploadQueue(os.path.join(directory, "upload_queue.db"), max_rows=readings)
+        now = time.time()
+        for index in range(readings):
+            upload_queue.put("hive1", now - (readings - index) * 60, reading(index))
+
+        target = UploadTarget(send, BULK_MAX_ENTRIES if bulk else 1, 0.0)
+        drainer = UploadDrainer(upload_queue, {"hive1": target}, min_interval=update_interval,
+                                retry_interval=retry_interval, max_backoff=retry_interval * 8)
+        retries = 0
+        start = time.perf_counter()
+        drainer.start()
+        try:
+            while len(upload_queue):
+                retries = max([retries] + list(drainer.failures.values()))
+                print(f"\rQueued: {len(upload_queue):>6}", end="")
+                time.sleep(0.05)
+        finally:
+            elapsed = time.perf_counter() - start
+            print("")
+            drainer.stop()
+            upload_queue.close()
+            api.close()
+    return elapsed, list(api.latencies), retries
+
+
+def print_report(title, readings, elapsed, latencies, extra):
+    print("\n" + "=" * 60)
+    print(f"  {title}")
+    print("=" * 60)
+    print(f"Readings: {readings} in {elapsed:.2f}s ({readings / elapsed:.1f} readings/s)")
+    if latencies:
+        print(f"Requests: {len(latencies)}, latency mean {statistics.mean(latencies):.3f}s, "
+              f"p95 {percentile(latencies, 0.95):.3f}s, max {max(latencies):.3f}s")
+    print(extra)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark uploads against a local mock ThingSpeak server")
+    parser.add_argument("--readings", type=int, default=200, help="Number of readings to upload")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random server delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument("--update-interval", type=float, default=0.0,
+                        help="Channel rate limit in seconds (ThingSpeak free: 15)")
+    parser.add_argument("--bulk", action="store_true", help="Drain the queue with bulk updates")
+    parser.add_argument("--retry-interval", type=float, default=0.2,
+                        help="Drainer delay after a failed send in seconds")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for server errors and jitter")
+    args = parser.parse_args()
+
+    server = MockThingSpeakServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                  update_interval=args.update_interval, seed=args.seed)
+    server.start()
+    try:
+        elapsed, latencies, failed = run_direct(server, args.readings, args.update_interval)
+        print_report("DIRECT UPLOADS", args.readings, elapsed, latencies, f"Failed uploads: {failed}")
+
+        server.reset()
+        elapsed, latencies, retries = run_drain(server, args.readings, args.update_interval,
+                                                args.bulk, args.retry_interval)
+        print_report("QUEUE DRAIN" + (" (BULK)" if args.bulk else ""), args.readings, elapsed, latencies,
+                     f"Longest failure streak: {retries}, entries received: {len(server.entries)}")
+    finally:
+        server.stop()
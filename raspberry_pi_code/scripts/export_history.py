@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+History Export
+--------------
+Streams readings from the local history (data/history.db) to CSV, JSON
+lines, Parquet or plain column files. Rows are read and written in chunks,
+so memory use does not grow with the time range: a year of minute data
+exports on a Pi Zero.
+
+Formats:
+  csv      Comma-separated, one row per reading (default)
+  jsonl    One JSON object per line
+  parquet  Apache Parquet, one row group per chunk (needs pyarrow)
+  columns  Directory with one little-endian float64 file per column plus
+           schema.json; each file opens with numpy.memmap, no extra packages
+
+Usage:
+  python export_history.py [--start 2025-06-01] [--end 2025-07-01]
+                           [--hive hive1] [--fields weight,outdoor_temp]
+                           [--level raw|5min|hour|day]
+                           [--format csv|jsonl|parquet|columns]
+                           [--output FILE] [--db FILE] [--chunk-size N]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import calendar
+import numpy as np
+from BUZZWatch.raspberry_pi_code.data_collection_layer.history import (
+    HistoryStore,
+    HISTORY_FILE,
+    HISTORY_FIELDS,
+    ROLLUP_LEVELS
+)
+from BUZZWatch.raspberry_pi_code.services.api.thingspeak import format_created_at
+
+TIME_FORMATS = ('%Y-%m-%d', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S')
+
+
+def parse_time(text):
+    """Local date/time (or UTC with a trailing Z) as a time.time() timestamp."""
+    utc = text.endswith('Z')
+    text = text.rstrip('Z')
+    for format in TIME_FORMATS:
+        try:
+            parsed = time.strptime(text, format)
+        except ValueError:
+            continue
+        return calendar.timegm(parsed) if utc else time.mktime(parsed)
+    raise argparse.ArgumentTypeError(f"Invalid time: {text} (expected e.g. 2025-06-01 or 2025-06-01T12:00)")
+
+
+def export_columns(fields, level):
+    """Column names of an export, in order."""
+    if level == 'raw':
+        return ['created_at', 'hive'] + fields
+    return ['created_at', 'hive'] + [f"{field}_{stat}" for field in fields
+                                     for stat in ('mean', 'min', 'max', 'count')]
+
+
+def chunked(rows, size):
+    """Group an iterator of rows into lists of at most size rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CSVExport:
+    def __init__(self, output, columns):
+        self.columns = columns
+        self._file = sys.stdout if output == '-' else open(output, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        for row in rows:
+            row = dict(row, created_at=format_created_at(row['created_at']))
+            self._writer.writerow([row[column] for column in self.columns])
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class JSONLinesExport:
+    def __init__(self, output, columns):
+        self.columns = columns
+        self._file = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')
+
+    def write(self, rows):
+        for row in rows:
+            row = dict(row, created_at=format_created_at(row['created_at']))
+            self._file.write(json.dumps({column: row[column] for column in self.columns}) + '\n')
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetExport:
+    def __init__(self, output, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("The parquet format needs pyarrow (pip install pyarrow); "
+                              "use --format columns on devices without it")
+        if output == '-':
+            raise ValueError("The parquet format needs --output FILE")
+        self._pa = pa
+        self.columns = columns
+        self._schema = pa.schema(
+            [('created_at', pa.timestamp('ms', tz='UTC')), ('hive', pa.string())]
+            + [(name, pa.int64() if name.endswith('_count') else pa.float64()) for name in columns[2:]])
+        self._writer = pq.ParquetWriter(output, self._schema)
+
+    def write(self, rows):
+        arrays = [self._pa.array([int(row['created_at'] * 1000) for row in rows], self._pa.int64())
+                  .cast(self._schema.field('created_at').type)]
+        arrays += [self._pa.array([row[name] for row in rows], self._schema.field(name).type)
+                   for name in self.columns[1:]]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class ColumnsExport:
+    """
+    One <column>.f8 file (little-endian float64, NaN for missing) per column.
+    Hive names are stored as indexes into schema.json's "hives" list.
+    """
+
+    def __init__(self, output, columns):
+        if output == '-':
+            raise ValueError("The columns format needs --output DIRECTORY")
+        os.makedirs(output, exist_ok=True)
+        self.output = output
+        self.columns = columns
+        self.rows = 0
+        self.hives = []
+        self._files = {column: open(os.path.join(output, f"{column}.f8"), 'wb') for column in columns}
+
+    def write(self, rows):
+        for row in rows:
+            if row['hive'] not in self.hives:
+                self.hives.append(row['hive'])
+        for column in self.columns:
+            if column == 'hive':
+                values = [self.hives.index(row['hive']) for row in rows]
+            else:
+                values = [np.nan if row[column] is None else row[column] for row in rows]
+            self._files[column].write(np.asarray(values, dtype='<f8').tobytes())
+        self.rows += len(rows)
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        schema = {
+            'rows': self.rows,
+            'dtype': '<f8',
+            'columns': {column: f"{column}.f8" for column in self.columns},
+            'hives': self.hives,
+            'created_at': 'seconds since 1970-01-01 UTC',
+        }
+        with open(os.path.join(self.output, 'schema.json'), 'w') as f:
+            json.dump(schema, f, indent=2)
+
+
+EXPORTS = {
+    'csv': CSVExport,
+    'jsonl': JSONLinesExport,
+    'parquet': ParquetExport,
+    'columns': ColumnsExport,
+}
+
+
+def export(store, export_format, output, hive=None, start=None, end=None, fields=None,
+           level='raw', chunk_size=5000):
+    """
+    Stream the selected history to output.
+
+    Returns:
+        Number of rows written
+    """
+    fields = list(fields) if fields else HISTORY_FIELDS
+    unknown = set(fields) - set(HISTORY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    writer = EXPORTS[export_format](output, export_columns(fields, level))
+    count = 0
+    try:
+        hives = [hive] if isinstance(hive, str) else (hive or [None])
+        for name in hives:
+            rows = store.query(hive=name, start=start, end=end, fields=fields, level=level,
+                               chunk_size=chunk_size)
+            for chunk in chunked(rows, chunk_size):
+                writer.write(chunk)
+                count += len(chunk)
+    finally:
+        writer.close()
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the local BUZZWatch history")
+    parser.add_argument("--start", type=parse_time, help="First time included (local, or UTC with Z)")
+    parser.add_argument("--end", type=parse_time, help="First time excluded (local, or UTC with Z)")
+    parser.add_argument("--hive", action="append", help="Hive to export (repeatable, default: all)")
+    parser.add_argument("--fields", help=f"Comma-separated fields (default: {','.join(HISTORY_FIELDS)})")
+    parser.add_argument("--level", default="raw", choices=['raw'] + list(ROLLUP_LEVELS),
+                        help="Raw readings or a rollup level")
+    parser.add_argument("--format", default="csv", choices=list(EXPORTS), help="Output format")
+    parser.add_argument("--output", default="-", help="Output file or directory (default: stdout)")
+    parser.add_argument("--db", default=HISTORY_FILE, help="History database")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows read and written at a time")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No history database at {args.db}", file=sys.stderr)
+        sys.exit(1)
+    store = HistoryStore(args.db)
+    try:
+        fields = args.fields.split(',') if args.fields else None
+        count = export(store, args.format, args.output, args.hive, args.start, args.end,
+                       fields, args.level, args.chunk_size)
+        print(f"Exported {count} rows", file=sys.stderr)
+    except (ValueError, ImportError) as e:
+        print(f"Export failed: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        store.close()
@@ -1,36 +1,113 @@
 # raspberry_pi_code/scripts/run_pi.py
 
 import time
+from BUZZWatch.raspberry_pi_code import config
 from BUZZWatch.raspberry_pi_code.config import THINGSPEAK_API_KEY, COLLECTION_INTERVAL
 from BUZZWatch.raspberry_pi_code.data_collection_layer.data_collector import DataCollector
+from BUZZWatch.raspberry_pi_code.hardware_layer.sensors import initialize_sensors
+from BUZZWatch.raspberry_pi_code.data_collection_layer.history import HistoryStore
+from BUZZWatch.raspberry_pi_code.data_collection_layer.scheduler import CycleScheduler
+from BUZZWatch.raspberry_pi_code.services.upload_queue import UploadQueue
+from BUZZWatch.raspberry_pi_code.services.sinks.fanout import create_sink
 from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
 
 def main():
     print("[run_pi] Starting BUZZWatch...")
 
+    # Readings wait in a durable queue until ThingSpeak can be reached
+    upload_queue = None
+    if getattr(config, 'STORE_AND_FORWARD', True):
+        upload_queue = UploadQueue(max_rows=getattr(config, 'UPLOAD_QUEUE_MAX_ROWS', 50000))
+        print(f"[run_pi] Upload queue: {len(upload_queue)} readings waiting")
+
+    # Local history of all readings with 5-minute, hourly and daily rollups
+    history = None
+    if getattr(config, 'LOCAL_HISTORY', True):
+        history = HistoryStore(retention={'raw': getattr(config, 'HISTORY_RAW_DAYS', 7) * 86400})
+
+    # Extra outputs next to ThingSpeak, e.g. an MQTT broker or a local CSV file
+    sinks = []
+    for kind, options in getattr(config, 'OUTPUT_SINKS', {}).items():
+        try:
+            sinks.append(create_sink(kind, **options))
+            print(f"[run_pi] Output sink: {kind}")
+        except Exception as e:
+            log_error_to_file("ERR_SINK_CONFIG", f"{kind}: {str(e)}")
+            print(f"[run_pi] Output sink {kind} disabled: {str(e)}")
+
     # Initialize data collector with API key from config
-    collector = DataCollector(THINGSPEAK_API_KEY)
+    collector = DataCollector(
+        THINGSPEAK_API_KEY,
+        parallel=getattr(config, 'PARALLEL_ACQUISITION', True),
+        sensor_timeout=getattr(config, 'SENSOR_READ_TIMEOUT', 5.0),
+        temperature_compensation=getattr(config, 'TEMPERATURE_COMPENSATION', True),
+        collection_interval=COLLECTION_INTERVAL,
+        adaptive_sampling=getattr(config, 'ADAPTIVE_SAMPLING', False),
+        fast_interval=getattr(config, 'FAST_COLLECTION_INTERVAL', 5),
+        max_interval=getattr(config, 'MAX_COLLECTION_INTERVAL', 300),
+        http_timeouts=(getattr(config, 'THINGSPEAK_CONNECT_TIMEOUT', 5.0),
+                       getattr(config, 'THINGSPEAK_READ_TIMEOUT', 15.0)),
+        upload_queue=upload_queue,
+        thingspeak_channel_id=getattr(config, 'THINGSPEAK_CHANNEL_ID', None),
+        upload_batch_interval=getattr(config, 'UPLOAD_BATCH_INTERVAL', 0),
+        min_upload_interval=getattr(config, 'THINGSPEAK_UPDATE_INTERVAL', 15),
+        upload_coalesce=getattr(config, 'UPLOAD_COALESCE', 'latest'),
+        async_upload=getattr(config, 'ASYNC_UPLOAD', True),
+        upload_workers=getattr(config, 'UPLOAD_WORKERS', 2),
+        upload_timeout=getattr(config, 'UPLOAD_TIMEOUT', 30.0),
+        sinks=sinks,
+        upload_deadband=getattr(config, 'UPLOAD_DEADBAND', None),
+        upload_heartbeat=getattr(config, 'UPLOAD_HEARTBEAT', 900),
+        history=history,
+        sensor_intervals=getattr(config, 'SENSOR_INTERVALS', None),
+        sensor_phases=getattr(config, 'SENSOR_PHASES', None)
+    )
     
-    # Test ThingSpeak connection
-    if not collector.thingspeak.test_connection():
-        print("Program stopped due to ThingSpeak connection issue.")
-        return
+    # Test the ThingSpeak connection of every hive
+    for hive, channel in collector.channels.items():
+        print(f"[run_pi] Hive {hive}")
+        if not channel.thingspeak.test_connection():
+            if upload_queue is not None:
+                print("ThingSpeak not reachable, readings will be queued until it is.")
+                continue
+            print("Program stopped due to ThingSpeak connection issue.")
+            collector.close()
+            return
+    
+    print("[run_pi] Initializing sensors...")
+    initialize_sensors()
     
     print("[run_pi] Starting data collection...")
+
+    # Cycles start on fixed deadlines, so the time a cycle takes does not add up
+    scheduler = CycleScheduler(
+        collector.next_interval(),
+        policy=getattr(config, 'SCHEDULE_POLICY', 'skip'),
+        align=getattr(config, 'ALIGN_TO_CLOCK', True)
+    )
+    report_interval = getattr(config, 'SCHEDULE_REPORT_INTERVAL', 3600)
+    last_report = time.monotonic()
     
     while True:
         try:
+            # Wait for the next slot of the current collection interval
+            scheduler.wait(collector.next_interval())
+
             # Collect and upload sensor data
             collector.collect_and_upload_data()
-            
-            # Wait for next collection interval
-            time.sleep(COLLECTION_INTERVAL)
+
+            if report_interval and time.monotonic() - last_report >= report_interval:
+                print(f"[run_pi] {scheduler.report()}")
+                last_report = time.monotonic()
             
         except KeyboardInterrupt:
             print("\nStopping BUZZWatch data collection...")
+            print(f"[run_pi] {scheduler.report()}")
+            collector.close()
             break
         except Exception as e:
             log_error_to_file("ERR_MAIN", str(e))
+            # An error before the scheduler advanced would otherwise retry at once
             time.sleep(5)  # Wait a bit before retrying
 
 if __name__ == "__main__":
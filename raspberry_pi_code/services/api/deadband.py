@@ -0,0 +1,59 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Seconds after which a field is sent again even if it did not move
+DEADBAND_HEARTBEAT = 900.0
+
+
+class DeadbandFilter:
+    """
+    Change-only uploads: a field is sent only when it moved more than its
+    deadband away from the value last sent, or when it has not been sent for
+    `heartbeat` seconds. A reading in which no field qualifies is not sent
+    at all.
+
+    Fields without a deadband are sent whenever their value changes.
+    """
+
+    def __init__(self, deadbands: Dict[str, float], heartbeat: float = DEADBAND_HEARTBEAT):
+        """
+        Args:
+            deadbands: Field name -> allowed change, e.g. {'outdoor_temp': 0.2, 'weight': 0.05}
+            heartbeat: Most seconds a field goes without being sent
+        """
+        self.deadbands = dict(deadbands)
+        self.heartbeat = heartbeat
+        # Field name -> (value, time.time() it was sent)
+        self.sent: Dict[str, Tuple[float, float]] = {}
+        self.suppressed = 0   # Readings not sent because nothing changed
+
+    def changes(self, values: Dict[str, Optional[float]], now: Optional[float] = None,
+                sent: Optional[Dict[str, Tuple[float, float]]] = None) -> Dict[str, float]:
+        """
+        The fields of a reading that have to be sent (empty if none).
+
+        Args:
+            values: Field name -> value (None for missing)
+            now: time.time() of the reading (default: now)
+            sent: State to compare against (default: self.sent)
+        """
+        now = time.time() if now is None else now
+        sent = self.sent if sent is None else sent
+        result = {}
+        for name, value in values.items():
+            if value is None:
+                continue
+            last = sent.get(name)
+            if (last is None or now - last[1] >= self.heartbeat
+                    or abs(value - last[0]) > self.deadbands.get(name, 0.0)):
+                result[name] = value
+        return result
+
+    def commit(self, values: Dict[str, Any], now: Optional[float] = None,
+               sent: Optional[Dict[str, Tuple[float, float]]] = None):
+        """Record fields as sent (call once the upload succeeded)."""
+        now = time.time() if now is None else now
+        sent = self.sent if sent is None else sent
+        for name, value in values.items():
+            if value is not None:
+                sent[name] = (value, now)
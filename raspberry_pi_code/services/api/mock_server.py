@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Mock ThingSpeak Server
+----------------------
+A local stand-in for api.thingspeak.com that implements the two endpoints
+ThingSpeakAPI uses, POST /update and POST /channels/<id>/bulk_update.json,
+so uploads, retries and queue draining can be exercised offline.
+
+Latency, error rate and the channel rate limit are configurable. Like the
+real service, an /update that comes too early or carries no field is
+answered with "0" and a bulk update that comes too early with 429. Every request is recorded in `requests`, every
+accepted entry in `entries`.
+
+Usage:
+  python -m BUZZWatch.raspberry_pi_code.services.api.mock_server [--port 8080]
+         [--latency S] [--jitter S] [--error-rate P] [--update-interval S]
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import namedtuple
+from socketserver import ThreadingMixIn
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qsl
+from typing import Dict, List, Optional
+
+# path (str), api_key (str), body (dict), status (int), timestamp (time.time() when received)
+MockRequest = namedtuple('MockRequest', ['path', 'api_key', 'body', 'status', 'timestamp'])
+
+# api_key, entry_id (per key, from 1), created_at (str or None), fields (fieldN -> str)
+MockEntry = namedtuple('MockEntry', ['api_key', 'entry_id', 'created_at', 'fields'])
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockThingSpeakServer:
+    """ThingSpeak-compatible HTTP server running in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, update_interval: float = 0.0,
+                 api_keys: Optional[List[str]] = None, seed: Optional[int] = None):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port (0 picks a free one)
+            latency: Seconds each response is delayed
+            jitter: Extra random delay of up to this many seconds
+            error_rate: Fraction of requests answered with HTTP 500
+            update_interval: Minimum seconds between two accepted updates per write key
+            api_keys: Accepted write keys (None accepts any key)
+            seed: Random seed for jitter and errors
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.update_interval = update_interval
+        self.api_keys = set(api_keys) if api_keys else None
+        self.requests: List[MockRequest] = []
+        self.entries: List[MockEntry] = []
+        self._last_update: Dict[str, float] = {}
+        self._entry_ids: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[HTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass as ThingSpeakAPI(server=...)."""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL."""
+        self._server = _ThreadingHTTPServer((self.host, self.port), self._handler())
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-thingspeak", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(5.0)
+            self._server = None
+
+    def reset(self):
+        """Forget recorded requests, entries and rate-limit state."""
+        with self._lock:
+            self.requests.clear()
+            self.entries.clear()
+            self._last_update.clear()
+            self._entry_ids.clear()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, as api.thingspeak.com
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                status, content_type, body = server._respond(self.path, self.headers.get('Content-Type', ''), raw)
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST   # /update also accepts GET with a query string
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _respond(self, path: str, content_type: str, raw: bytes):
+        """Handle one request. Returns (status, content type, body)."""
+        now = time.time()
+        url = urlparse(path)
+        if 'json' in content_type:
+            try:
+                data = json.loads(raw.decode('utf-8') or '{}')
+            except ValueError:
+                data = {}
+        else:
+            data = dict(parse_qsl(raw.decode('utf-8')))
+        data.update(parse_qsl(url.query))
+        api_key = data.get('api_key') or data.get('write_api_key') or ''
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        bulk = url.path.startswith('/channels/') and url.path.endswith('/bulk_update.json')
+        with self._lock:
+            if url.path != '/update' and not bulk:
+                status, content_type, body = 404, 'text/plain', 'Not Found'
+            elif self.api_keys is not None and api_key not in self.api_keys:
+                status, content_type, body = 401, 'application/json', '{"status":"401","error":"Unauthorized"}'
+            elif self.error_rate and self._random.random() < self.error_rate:
+                status, content_type, body = 500, 'text/plain', 'Internal Server Error'
+            elif not bulk and not any(name.startswith('field') for name in data):
+                # An update without fields writes no entry (used as connection test)
+                status, content_type, body = 200, 'text/plain', '0'
+            elif now - self._last_update.get(api_key, float('-inf')) < self.update_interval:
+                # ThingSpeak rejects updates that come too early
+                if bulk:
+                    status, content_type, body = 429, 'application/json', '{"status":"429","error":"Too Many Requests"}'
+                else:
+                    status, content_type, body = 200, 'text/plain', '0'
+            else:
+                self._last_update[api_key] = now
+                if bulk:
+                    for update in data.get('updates', []):
+                        self._add_entry(api_key, update)
+                    status, content_type, body = 202, 'application/json', '{"success":true}'
+                else:
+                    status, content_type, body = 200, 'text/plain', str(self._add_entry(api_key, data))
+            self.requests.append(MockRequest(url.path, api_key, data, status, now))
+        return status, content_type, body
+
+    def _add_entry(self, api_key: str, data: Dict) -> int:
+        entry_id = self._entry_ids.get(api_key, 0) + 1
+        self._entry_ids[api_key] = entry_id
+        fields = {name: str(value) for name, value in data.items() if name.startswith('field')}
+        self.entries.append(MockEntry(api_key, entry_id, data.get('created_at'), fields))
+        return entry_id
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ThingSpeak-compatible server for offline tests")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="TCP port")
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay of up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 500")
+    parser.add_argument("--update-interval", type=float, default=15.0,
+                        help="Minimum seconds between accepted updates per write key")
+    args = parser.parse_args()
+
+    server = MockThingSpeakServer(args.host, args.port, args.latency, args.jitter,
+                                  args.error_rate, args.update_interval)
+    print(f"Mock ThingSpeak listening on {server.start()}")
+    seen = 0
+    try:
+        while True:
+            time.sleep(1)
+            for request in server.requests[seen:]:
+                print(f"{request.path} {request.status}: {request.body}")
+            seen = len(server.requests)
+    except KeyboardInterrupt:
+        server.stop()
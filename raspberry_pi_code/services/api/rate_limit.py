@@ -0,0 +1,157 @@
+import time
+import threading
+from typing import Any, Dict, Optional
+
+# Seconds between two updates of a ThingSpeak channel (free accounts; paid plans allow 1)
+THINGSPEAK_UPDATE_INTERVAL = 15.0
+
+# Extra seconds per interval: ThingSpeak times the interval between the arrivals of two
+# requests, which varies with their network latency
+RATE_LIMIT_MARGIN = 0.5
+
+_buckets: Dict[str, 'TokenBucket'] = {}
+_buckets_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    Token bucket: one token per request, refilled at one token every `interval`
+    (plus `margin`) seconds up to `capacity`. Thread-safe.
+    """
+
+    def __init__(self, interval: float, capacity: int = 1, margin: float = 0.0):
+        """
+        Args:
+            interval: Seconds to refill one token
+            capacity: Most tokens that can be saved up (burst size)
+            margin: Seconds added to each refill, as a safety margin
+        """
+        self.interval = interval
+        self.margin = margin if interval > 0 else 0.0
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.interval > 0:
+            self._tokens = min(float(self.capacity),
+                               self._tokens + (now - self._updated) / (self.interval + self.margin))
+        else:
+            self._tokens = float(self.capacity)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (1.0 - self._tokens) * (self.interval + self.margin))
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def restart(self):
+        """
+        Start refilling from now without a saved token, e.g. when the response
+        to a request arrived: the service times the interval from its arrival.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a token; False if none became available within timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire():
+            wait = self.delay()
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(max(wait, 0.01))
+        return True
+
+
+def channel_bucket(api_key: str, interval: float = THINGSPEAK_UPDATE_INTERVAL) -> TokenBucket:
+    """
+    The token bucket of a ThingSpeak channel, shared by every client using the
+    same write key (uploads and bulk uploads alike).
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(api_key)
+        if bucket is None or bucket.interval != interval:
+            bucket = _buckets[api_key] = TokenBucket(interval, margin=RATE_LIMIT_MARGIN)
+        return bucket
+
+
+class ReadingCoalescer:
+    """
+    Merges readings that arrive faster than the channel may be updated.
+
+    'latest': the newest value of each field wins (a field missing in the
+    newest reading keeps its last known value). 'mean': each field is the
+    average of the merged readings. The merged reading carries the newest
+    created_at.
+    """
+
+    MODES = ('latest', 'mean')
+
+    def __init__(self, mode: str = 'latest'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown coalesce mode: {mode}")
+        self.mode = mode
+        self._sums: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._latest: Dict[str, Any] = {}
+        self._created_at: Optional[float] = None
+        self.merged = 0
+
+    def __len__(self) -> int:
+        return self.merged
+
+    def add(self, values: Dict[str, Optional[float]], created_at: Optional[float] = None):
+        """Add one reading (field name -> value, None for missing)."""
+        for name, value in values.items():
+            if value is None:
+                continue
+            self._latest[name] = value
+            self._sums[name] = self._sums.get(name, 0.0) + value
+            self._counts[name] = self._counts.get(name, 0) + 1
+        if created_at is not None:
+            self._created_at = created_at
+        self.merged += 1
+
+    def restore(self, values: Dict[str, Optional[float]], created_at: Optional[float] = None):
+        """
+        Put back a popped reading whose upload failed. Readings added since
+        it was popped are newer: in 'latest' mode their values win.
+        """
+        for name, value in values.items():
+            if value is None:
+                continue
+            self._latest.setdefault(name, value)
+            self._sums[name] = self._sums.get(name, 0.0) + value
+            self._counts[name] = self._counts.get(name, 0) + 1
+        if created_at is not None and (self._created_at is None or created_at > self._created_at):
+            self._created_at = created_at
+        self.merged += 1
+
+    def pop(self):
+        """
+        Return (values, created_at) of the merged reading and start over.
+        """
+        if self.mode == 'mean':
+            values = {name: round(self._sums[name] / self._counts[name], 2) for name in self._sums}
+        else:
+            values = dict(self._latest)
+        created_at = self._created_at
+        self._sums.clear()
+        self._counts.clear()
+        self._latest.clear()
+        self._created_at = None
+        self.merged = 0
+        return values, created_at
@@ -1,51 +1,193 @@
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
 import requests
-from typing import Optional, Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Optional, Dict, Any, List
 from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+from BUZZWatch.raspberry_pi_code.services.api.rate_limit import (
+    THINGSPEAK_UPDATE_INTERVAL,
+    ReadingCoalescer,
+    channel_bucket
+)
+from BUZZWatch.raspberry_pi_code.services.api.deadband import DeadbandFilter
+
+THINGSPEAK_SERVER = "https://api.thingspeak.com"
+CONNECT_TIMEOUT = 5.0   # seconds to establish the TCP/TLS connection
+READ_TIMEOUT = 15.0     # seconds to wait for the server's response
+BULK_MAX_ENTRIES = 960  # Entries per bulk-update request allowed on free channels
+
+# upload_data() argument -> ThingSpeak field
+FIELD_MAP = {
+    'indoor_temp': 'field1',
+    'indoor_humidity': 'field2',
+    'outdoor_temp': 'field3',
+    'outdoor_humidity': 'field4',
+    'weight': 'field5',
+}
+
+_shared_session = None
+_shared_session_users = 0
+_session_lock = threading.Lock()
+
+def create_session(pool_size: int = 4) -> requests.Session:
+    """
+    Create an HTTP session that keeps its connections alive between requests,
+    so the TLS handshake is paid once instead of on every upload.
+
+    Args:
+        pool_size: Connections kept open per host
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+def get_shared_session() -> requests.Session:
+    """
+    Session shared by all ThingSpeakAPI instances (one connection pool for all channels).
+    Every call must be paired with release_shared_session().
+    """
+    global _shared_session, _shared_session_users
+    with _session_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        _shared_session_users += 1
+        return _shared_session
+
+def release_shared_session():
+    """Give back the shared session; it is closed when its last user releases it."""
+    global _shared_session, _shared_session_users
+    with _session_lock:
+        if _shared_session is None:
+            return
+        _shared_session_users -= 1
+        if _shared_session_users <= 0:
+            _shared_session.close()
+            _shared_session = None
+            _shared_session_users = 0
+
+def format_created_at(timestamp: float) -> str:
+    """ISO 8601 (UTC) form of a time.time() timestamp, as accepted by ThingSpeak's created_at."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
 class ThingSpeakAPI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str,
+                 connect_timeout: float = CONNECT_TIMEOUT,
+                 read_timeout: float = READ_TIMEOUT,
+                 server: str = THINGSPEAK_SERVER,
+                 session: Optional[requests.Session] = None,
+                 channel_id: Optional[str] = None,
+                 update_interval: float = THINGSPEAK_UPDATE_INTERVAL,
+                 coalesce: str = 'latest',
+                 deadband: Optional[DeadbandFilter] = None):
+        """
+        Args:
+            api_key: ThingSpeak Write API Key
+            connect_timeout: Seconds allowed to connect to the server
+            read_timeout: Seconds allowed for the server's response
+            server: ThingSpeak server URL
+            session: HTTP session to use (defaults to the shared keep-alive session);
+                a session passed in is left open by close()
+            channel_id: ThingSpeak channel ID, required for bulk_upload()
+            update_interval: Minimum seconds between two updates the channel accepts
+            coalesce: How readings that arrive faster than update_interval are
+                merged: 'latest' (newest value wins) or 'mean' (average)
+            deadband: If given, only fields that changed beyond their deadband are
+                sent, and readings without such a change are skipped
+        """
         self.api_key = api_key
-        self.base_url = "https://api.thingspeak.com/update"
-        
+        self.channel_id = channel_id
+        self.server = server.rstrip('/')
+        self.base_url = f"{self.server}/update"
+        self.timeout = (connect_timeout, read_timeout)
+        self._shared_session = session is None
+        self.session = session or get_shared_session()
+        self.last_latency: Optional[float] = None
+        self.latencies = deque(maxlen=100)  # seconds per completed request, newest last
+        # Requests the channel would reject are never sent; the bucket is shared per write key
+        self.rate_limiter = channel_bucket(api_key, update_interval)
+        self._coalescer = ReadingCoalescer(coalesce)
+        self.deferred = False   # True if the last upload_data() call was held back by the rate limit
+        self.coalesced = 0      # Readings merged into a later upload so far
+        self.deadband = deadband
+        self.skipped = False    # True if the last upload_data() call had nothing to send
+        self.rejected = False   # True if ThingSpeak answered the last request but did not accept it
+        # A deferred reading is sent by a timer as soon as the rate limit allows
+        self._lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def _post(self, url: str, **kwargs) -> requests.Response:
+        """POST through the pooled session and record the request latency."""
+        self.last_latency = None
+        start = time.perf_counter()
+        response = self.session.post(url, timeout=self.timeout, **kwargs)
+        self.last_latency = time.perf_counter() - start
+        self.latencies.append(self.last_latency)
+        return response
+
     def test_connection(self) -> bool:
         """
-        Test the connection to ThingSpeak by sending a test value.
+        Test the connection to ThingSpeak with an update that carries no field.
+        ThingSpeak writes no entry for it, so the test does not use up the
+        channel's rate limit and the first reading can be sent right away.
         Returns True if successful, False if connection fails.
         """
         try:
             print("Testing connection to ThingSpeak...")
-            # Send a test value to field 1
             test_data = {
-                'api_key': self.api_key,
-                'field1': 0  # Test value
+                'api_key': self.api_key
             }
-            
-            response = requests.post(self.base_url, data=test_data)
-            
+
+            response = self._post(self.base_url, data=test_data)
+
             if response.status_code == 200:
-                print("Successfully connected to ThingSpeak!")
+                print(f"Successfully connected to ThingSpeak! ({self.last_latency:.2f}s)")
                 return True
             else:
                 print(f"Error connecting to ThingSpeak. Error code: {response.status_code}")
-                log_error_to_file("ERR_THINGSPEAK_TEST", 
+                log_error_to_file("ERR_THINGSPEAK_TEST",
                                 f"Status code: {response.status_code}, Response: {response.text}")
                 return False
-                
+
         except Exception as e:
             print(f"Error connecting to ThingSpeak: {str(e)}")
             log_error_to_file("ERR_THINGSPEAK_TEST", str(e))
             return False
-        
-    def upload_data(self, 
+
+    def upload_data(self,
                    indoor_temp: Optional[float] = None,
                    indoor_humidity: Optional[float] = None,
                    outdoor_temp: Optional[float] = None,
                    outdoor_humidity: Optional[float] = None,
-                   weight: Optional[float] = None) -> bool:
+                   weight: Optional[float] = None,
+                   created_at: Optional[float] = None,
+                   wait: bool = False) -> bool:
         """
         Upload sensor data to ThingSpeak.
         Returns True if successful, False otherwise.
-        
+        The request latency is available in self.last_latency.
+
+        created_at is the acquisition time (time.time()) of a reading that is
+        uploaded late; ThingSpeak stamps the entry with the upload time if omitted.
+
+        If the channel's rate limit does not allow an update yet, the reading
+        is not sent: with wait=True the call blocks until it may be sent,
+        otherwise it is kept, merged with later readings (see coalesce) and
+        sent by a timer once the rate limit allows; the call returns True with
+        self.deferred set.
+
+        With a deadband, unchanged fields are left out and a reading without
+        any change is not sent: the call returns True with self.skipped set.
+        The same holds for a reading without any value (ThingSpeak would
+        answer "0" to it).
+
+        A False result with self.rejected set means ThingSpeak answered but
+        did not store the entry; otherwise it could not be reached.
+
         Field mappings:
         - field1: Indoor Temperature
         - field2: Indoor Humidity
@@ -53,30 +195,190 @@ class ThingSpeakAPI:
         - field4: Outdoor Humidity
         - field5: Weight
         """
+        values = {
+            'indoor_temp': indoor_temp,
+            'indoor_humidity': indoor_humidity,
+            'outdoor_temp': outdoor_temp,
+            'outdoor_humidity': outdoor_humidity,
+            'weight': weight
+        }
+        self.deferred = False
+        self.skipped = False
+        self.rejected = False
+        with self._lock:
+            if all(value is None for value in values.values()) and not len(self._coalescer):
+                self.skipped = True
+                return True
+            if self.deadband is not None:
+                values = self.deadband.changes(values, created_at)
+                if not values and not len(self._coalescer):
+                    self.deadband.suppressed += 1
+                    self.skipped = True
+                    return True
+            self._coalescer.add(values, created_at)
+            if not wait:
+                if not self.rate_limiter.try_acquire():
+                    self.deferred = True
+                    self._schedule_flush()
+                    return True
+                values, created_at = self._pop()
+
+        if wait:
+            self.rate_limiter.acquire()
+            with self._lock:
+                if not len(self._coalescer):
+                    # Sent by the flush timer in the meantime
+                    return True
+                values, created_at = self._pop()
+
+        return self._send(values, created_at)
+
+    def flush(self) -> bool:
+        """
+        Send a deferred reading if the rate limit allows it now (otherwise the
+        flush is scheduled again). Called by the flush timer.
+        Returns True if nothing was pending or the reading was sent.
+        """
+        with self._lock:
+            self._flush_timer = None
+            if not len(self._coalescer):
+                return True
+            if not self.rate_limiter.try_acquire():
+                # Another client of the same channel took the token
+                self._schedule_flush()
+                return True
+            values, created_at = self._pop()
+        if not self._send(values, created_at):
+            log_error_to_file("ERR_DATA_UPLOAD", "Failed to upload a deferred reading to ThingSpeak, "
+                                                 "it is kept for the next upload")
+            with self._lock:
+                # Merged with what arrived meanwhile and sent again at the next token
+                self._coalescer.restore(values, created_at)
+                self._schedule_flush()
+            return False
+        return True
+
+    def _schedule_flush(self):
+        """Start the flush timer for the next token (called with self._lock held)."""
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(max(0.01, self.rate_limiter.delay()), self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _pop(self):
+        """Take the merged pending reading (called with self._lock held)."""
+        self.coalesced += len(self._coalescer) - 1
+        return self._coalescer.pop()
+
+    def _send(self, values: Dict[str, Any], created_at: Optional[float]) -> bool:
+        """POST one (merged) reading to /update."""
         data: Dict[str, Any] = {
             'api_key': self.api_key
         }
-        
+
         # Add available sensor data
-        if indoor_temp is not None:
-            data['field1'] = indoor_temp
-        if indoor_humidity is not None:
-            data['field2'] = indoor_humidity
-        if outdoor_temp is not None:
-            data['field3'] = outdoor_temp
-        if outdoor_humidity is not None:
-            data['field4'] = outdoor_humidity
-        if weight is not None:
-            data['field5'] = weight
-            
+        data.update(self._fields(**values))
+        if created_at is not None:
+            data['created_at'] = format_created_at(created_at)
+
+        self.rejected = False
         try:
-            response = requests.post(self.base_url, data=data)
-            if response.status_code == 200:
+            response = self._post(self.base_url, data=data)
+            self.rate_limiter.restart()
+            # ThingSpeak answers 200 with body "0" when it did not accept the entry
+            if response.status_code == 200 and response.text.strip() != '0':
+                if self.deadband is not None:
+                    self.deadband.commit(values, created_at)
                 return True
             else:
-                log_error_to_file("ERR_THINGSPEAK_UPLOAD", 
+                self.rejected = response.status_code == 200 or 400 <= response.status_code < 500
+                log_error_to_file("ERR_THINGSPEAK_UPLOAD",
                                 f"Status code: {response.status_code}, Response: {response.text}")
                 return False
+        except requests.Timeout as e:
+            log_error_to_file("ERR_THINGSPEAK_TIMEOUT", str(e))
+            return False
         except Exception as e:
             log_error_to_file("ERR_THINGSPEAK_UPLOAD", str(e))
-            return False 
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def _fields(**values) -> Dict[str, Any]:
+        """Map the available readings to ThingSpeak fields."""
+        return {FIELD_MAP[name]: value for name, value in values.items() if value is not None}
+
+    @property
+    def supports_bulk(self) -> bool:
+        return bool(self.channel_id)
+
+    def bulk_upload(self, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Upload many timestamped readings in one bulk-update request.
+        Returns True if ThingSpeak accepted them, False otherwise.
+
+        Args:
+            entries: At most BULK_MAX_ENTRIES dicts with 'created_at'
+                (time.time()) and any upload_data() field arguments
+        """
+        if not self.channel_id:
+            raise ValueError("bulk_upload needs the ThingSpeak channel ID")
+        if len(entries) > BULK_MAX_ENTRIES:
+            raise ValueError(f"At most {BULK_MAX_ENTRIES} entries per bulk update")
+        updates = []
+        sent = dict(self.deadband.sent) if self.deadband is not None else None
+        for entry in entries:
+            values = dict(entry)
+            created_at = values.pop('created_at')
+            if self.deadband is not None:
+                values = self.deadband.changes(values, created_at, sent)
+                if not values:
+                    self.deadband.suppressed += 1
+                    continue
+                self.deadband.commit(values, created_at, sent)
+            fields = self._fields(**values)
+            if not fields:
+                # An entry without any value would make ThingSpeak reject the request
+                continue
+            update = {'created_at': format_created_at(created_at)}
+            update.update(fields)
+            updates.append(update)
+
+        self.rejected = False
+        if not updates:
+            return True
+        if not self.rate_limiter.acquire(timeout=2 * self.rate_limiter.interval):
+            return False
+
+        url = f"{self.server}/channels/{self.channel_id}/bulk_update.json"
+        try:
+            response = self._post(url, json={'write_api_key': self.api_key, 'updates': updates})
+            self.rate_limiter.restart()
+            if response.status_code in (200, 202):
+                if sent is not None:
+                    self.deadband.sent = sent
+                return True
+            # 429: sent too early, which is not the readings' fault
+            self.rejected = 400 <= response.status_code < 500 and response.status_code != 429
+            log_error_to_file("ERR_THINGSPEAK_BULK",
+                              f"Status code: {response.status_code}, Response: {response.text}")
+            return False
+        except requests.Timeout as e:
+            log_error_to_file("ERR_THINGSPEAK_TIMEOUT", str(e))
+            return False
+        except Exception as e:
+            log_error_to_file("ERR_THINGSPEAK_BULK", str(e))
+            return False
+
+    def close(self):
+        """
+        Stop the flush timer and release the shared session. The shared
+        connections are closed once the last client is closed; a session
+        passed to the constructor belongs to the caller and stays open.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            shared, self._shared_session = self._shared_session, False
+        if shared:
+            release_shared_session()
@@ -0,0 +1,146 @@
+# raspberry_pi_code/services/async_uploader.py
+#
+# Uploads run on their own asyncio event loop in a background thread. The
+# collection loop only hands readings over and never waits for the network,
+# so a slow or stalled upload cannot shift the sensor timing.
+
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+
+class AsyncUploader:
+    """
+    Bounded upload queue consumed by async worker tasks.
+
+    submit() is thread-safe and never blocks: when the queue is full the
+    oldest waiting reading is dropped (backpressure falls on stale data, not
+    on acquisition). Each worker runs the blocking send function on a small
+    thread pool under its own timeout. Uploads of the same channel are
+    serialized so their order and the channel's rate limit are kept; uploads
+    of different channels run concurrently. A send that times out is counted
+    and logged, but its channel stays busy until the send has returned.
+    """
+
+    def __init__(self, send: Callable[[str, Optional[float], Dict[str, Any]], bool],
+                 workers: int = 2, queue_size: int = 100, timeout: float = 30.0):
+        """
+        Args:
+            send: Blocking callable(channel, created_at, fields) -> bool
+            workers: Number of concurrent upload workers
+            queue_size: Readings that can wait for a worker before the oldest is dropped
+            timeout: Seconds a single upload may take before it is given up
+        """
+        self.send = send
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self.submitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=100)  # seconds from submit() to completed upload
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._channel_locks: Dict[str, asyncio.Lock] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload")
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._drain_timeout = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="async-uploader", daemon=True)
+            self._thread.start()
+            self._ready.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stopping = asyncio.Event()
+        tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._ready.set()
+        await self._stopping.wait()
+        try:
+            await asyncio.wait_for(self._queue.join(), self._drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def pending(self) -> int:
+        """Readings waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, channel: str, created_at: Optional[float], fields: Dict[str, Any]):
+        """Hand a reading over for upload. Returns immediately."""
+        self.start()
+        self.submitted += 1
+        self._loop.call_soon_threadsafe(self._put, (channel, created_at, fields, time.monotonic()))
+
+    def _put(self, item):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+            log_error_to_file("ERR_UPLOAD_BACKLOG",
+                              f"Upload queue full ({self.queue_size}), dropped the oldest reading")
+        self._queue.put_nowait(item)
+
+    async def _worker(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            channel, created_at, fields, submitted = await self._queue.get()
+            try:
+                lock = self._channel_locks.setdefault(channel, asyncio.Lock())
+                async with lock:
+                    send = loop.run_in_executor(self._executor, self.send, channel, created_at, fields)
+                    try:
+                        # Shielded: a timeout must not leave the channel while the send still runs
+                        success = await asyncio.wait_for(asyncio.shield(send), self.timeout)
+                    except asyncio.TimeoutError:
+                        self.timeouts += 1
+                        log_error_to_file("ERR_UPLOAD_TIMEOUT", f"{channel}: upload took longer than {self.timeout}s")
+                        # The blocking send cannot be interrupted; the channel stays busy
+                        # until it returns, so the next upload cannot overtake it
+                        try:
+                            await send
+                        except Exception:
+                            pass
+                        continue
+                if success:
+                    self.sent += 1
+                    self.latencies.append(time.monotonic() - submitted)
+                else:
+                    self.failed += 1
+            except Exception as e:
+                self.failed += 1
+                log_error_to_file("ERR_UPLOAD_WORKER", f"{channel}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers, giving waiting readings up to timeout seconds to be sent."""
+        if self._thread is None:
+            return
+        self._drain_timeout = timeout
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout + 1.0)
+        self._thread = None
+        self._executor.shutdown(wait=False)
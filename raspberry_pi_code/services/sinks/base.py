@@ -0,0 +1,25 @@
+# raspberry_pi_code/services/sinks/base.py
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+
+class Sink(ABC):
+    """
+    Destination for collected readings (ThingSpeak, an MQTT broker, a local file, ...).
+
+    A reading is identified by the hive it belongs to, its acquisition time
+    (time.time()) and its fields, the upload_data() keyword arguments:
+    indoor_temp, indoor_humidity, outdoor_temp, outdoor_humidity and weight
+    (None for a missing value). Implementations must be safe to call from a
+    worker thread, report failures by returning False and never raise.
+    """
+
+    name = 'sink'
+
+    @abstractmethod
+    def send(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> bool:
+        """Deliver one reading. Returns True if it was accepted."""
+
+    def close(self):
+        """Release connections and files."""
@@ -0,0 +1,73 @@
+# raspberry_pi_code/services/sinks/fanout.py
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+from BUZZWatch.raspberry_pi_code.services.sinks.base import Sink
+
+
+def create_sink(kind: str, **options) -> Sink:
+    """
+    Build an output sink by name.
+
+    Args:
+        kind: 'mqtt' or 'file' (ThingSpeak is always set up by the collector)
+        options: Keyword arguments for the sink class
+    """
+    if kind == 'mqtt':
+        from BUZZWatch.raspberry_pi_code.services.sinks.mqtt_sink import MQTTSink
+        return MQTTSink(**options)
+    if kind == 'file':
+        from BUZZWatch.raspberry_pi_code.services.sinks.file_sink import FileSink
+        return FileSink(**options)
+    raise ValueError(f"Unknown output sink: {kind}")
+
+
+class SinkFanOut:
+    """
+    Sends each reading to several sinks at the same time.
+
+    A slow sink (e.g. HTTPS on a bad link) does not hold up the others; the
+    call returns once every sink has answered or `timeout` has passed.
+    """
+
+    def __init__(self, sinks: List[Sink], timeout: float = 30.0):
+        """
+        Args:
+            sinks: Sinks every reading is sent to
+            timeout: Seconds to wait for all sinks
+        """
+        self.sinks = list(sinks)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.sinks)),
+                                            thread_name_prefix="sink") if len(self.sinks) > 1 else None
+
+    def send(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> Dict[str, bool]:
+        """Deliver a reading to all sinks. Returns the result per sink name."""
+        if self._executor is None:
+            return {sink.name: self._send(sink, hive, created_at, fields) for sink in self.sinks}
+
+        futures = {sink.name: self._executor.submit(self._send, sink, hive, created_at, fields)
+                   for sink in self.sinks}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                log_error_to_file("ERR_SINK_TIMEOUT", f"{name}: no answer within {self.timeout}s")
+                results[name] = False
+        return results
+
+    @staticmethod
+    def _send(sink: Sink, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> bool:
+        try:
+            return sink.send(hive, created_at, fields)
+        except Exception as e:
+            log_error_to_file("ERR_SINK", f"{sink.name}: {str(e)}")
+            return False
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
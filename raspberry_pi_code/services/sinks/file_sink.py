@@ -0,0 +1,72 @@
+# raspberry_pi_code/services/sinks/file_sink.py
+
+import os
+import csv
+import json
+import time
+import threading
+from typing import Dict, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+from BUZZWatch.raspberry_pi_code.services.sinks.base import Sink
+
+FILE_SINK_COLUMNS = ['created_at', 'hive', 'indoor_temp', 'indoor_humidity',
+                     'outdoor_temp', 'outdoor_humidity', 'weight']
+
+
+class FileSink(Sink):
+    """
+    Appends readings to a local JSON-lines or CSV file.
+
+    The file is kept open and each reading is one appended line, flushed
+    right away, so a local copy of everything collected exists even
+    without a network.
+    """
+
+    name = 'file'
+
+    def __init__(self, path: str, format: str = 'jsonl'):
+        """
+        Args:
+            path: Output file (created with its directory if missing)
+            format: 'jsonl' or 'csv'
+        """
+        if format not in ('jsonl', 'csv'):
+            raise ValueError(f"Unknown file sink format: {format}")
+        self.path = path
+        self.format = format
+        self._file = None
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        if self.format == 'csv':
+            self._writer = csv.writer(self._file)
+            if new_file:
+                self._writer.writerow(FILE_SINK_COLUMNS)
+
+    def send(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> bool:
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(created_at))
+        try:
+            with self._lock:
+                if self._file is None:
+                    self._open()
+                if self.format == 'csv':
+                    self._writer.writerow([timestamp, hive] + [fields.get(c) for c in FILE_SINK_COLUMNS[2:]])
+                else:
+                    self._file.write(json.dumps(dict(fields, created_at=timestamp, hive=hive)) + '\n')
+                self._file.flush()
+            return True
+        except OSError as e:
+            log_error_to_file("ERR_FILE_SINK", str(e))
+            return False
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
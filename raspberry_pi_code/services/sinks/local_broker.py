@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Local MQTT Broker Stand-in
+--------------------------
+A minimal MQTT 3.1.1 broker for testing the MQTT sink without a network or
+a Mosquitto installation. It accepts any client, acknowledges QoS 0/1/2
+publishes, forwards messages to subscribers (at QoS 0) and records
+everything it received in `messages`.
+
+Not a production broker: no persistence, retained messages, wills or
+authentication.
+
+Usage:
+  python -m BUZZWatch.raspberry_pi_code.services.sinks.local_broker [--port 1883]
+"""
+
+import time
+import asyncio
+import argparse
+import threading
+from collections import namedtuple
+from typing import List, Optional
+
+# topic (str), payload (bytes), qos (int), timestamp (time.time() when received)
+BrokerMessage = namedtuple('BrokerMessage', ['topic', 'payload', 'qos', 'timestamp'])
+
+CONNECT, CONNACK, PUBLISH, PUBACK, PUBREC, PUBREL, PUBCOMP = 1, 2, 3, 4, 5, 6, 7
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK, PINGREQ, PINGRESP, DISCONNECT = 8, 9, 10, 11, 12, 13, 14
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT topic filter match with + and # wildcards."""
+    filter_levels = topic_filter.split('/')
+    topic_levels = topic.split('/')
+    for index, level in enumerate(filter_levels):
+        if level == '#':
+            return True
+        if index >= len(topic_levels) or (level != '+' and level != topic_levels[index]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def _packet(packet_type: int, flags: int, body: bytes) -> bytes:
+    length = len(body)
+    encoded = bytearray()
+    while True:
+        byte = length % 128
+        length //= 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    return bytes([packet_type << 4 | flags]) + bytes(encoded) + body
+
+
+def _string(data: bytes, offset: int):
+    length = int.from_bytes(data[offset:offset + 2], 'big')
+    return data[offset + 2:offset + 2 + length].decode('utf-8'), offset + 2 + length
+
+
+class LocalMQTTBroker:
+    """In-process MQTT broker running on its own event loop thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port (0 picks a free one; see self.port after start())
+        """
+        self.host = host
+        self.port = port
+        self.messages: List[BrokerMessage] = []
+        self._subscriptions = []   # (topic filter, writer)
+        self._clients = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> int:
+        """Start listening in a background thread and return the port."""
+        self._thread = threading.Thread(target=self._run, name="mqtt-broker", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self.port
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Drop the client connections still open and let their handlers finish
+            for writer in list(self._clients):
+                writer.close()
+            self._loop.run_until_complete(asyncio.sleep(0.1))
+            self._loop.close()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5.0)
+
+    async def _read_packet(self, reader):
+        header = await reader.readexactly(1)
+        multiplier, length = 1, 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        body = await reader.readexactly(length) if length else b''
+        return header[0] >> 4, header[0] & 0x0F, body
+
+    async def _handle(self, reader, writer):
+        self._clients.add(writer)
+        try:
+            while True:
+                packet_type, flags, body = await self._read_packet(reader)
+                if packet_type == CONNECT:
+                    writer.write(_packet(CONNACK, 0, b'\x00\x00'))
+                elif packet_type == PUBLISH:
+                    self._publish(writer, flags, body)
+                elif packet_type == PUBREL:
+                    writer.write(_packet(PUBCOMP, 0, body[:2]))
+                elif packet_type == SUBSCRIBE:
+                    packet_id, offset, granted = body[:2], 2, bytearray()
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        offset += 1
+                        self._subscriptions.append((topic_filter, writer))
+                        granted.append(0)
+                    writer.write(_packet(SUBACK, 0, packet_id + bytes(granted)))
+                elif packet_type == UNSUBSCRIBE:
+                    packet_id, offset = body[:2], 2
+                    while offset < len(body):
+                        topic_filter, offset = _string(body, offset)
+                        self._subscriptions = [(f, w) for f, w in self._subscriptions
+                                               if not (f == topic_filter and w is writer)]
+                    writer.write(_packet(UNSUBACK, 0, packet_id))
+                elif packet_type == PINGREQ:
+                    writer.write(_packet(PINGRESP, 0, b''))
+                elif packet_type == DISCONNECT:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._subscriptions = [(f, w) for f, w in self._subscriptions if w is not writer]
+            self._clients.discard(writer)
+            writer.close()
+
+    def _publish(self, writer, flags: int, body: bytes):
+        qos = (flags >> 1) & 0x03
+        topic, offset = _string(body, 0)
+        packet_id = body[offset:offset + 2] if qos else b''
+        payload = body[offset + len(packet_id):]
+        self.messages.append(BrokerMessage(topic, payload, qos, time.time()))
+
+        if qos == 1:
+            writer.write(_packet(PUBACK, 0, packet_id))
+        elif qos == 2:
+            writer.write(_packet(PUBREC, 0, packet_id))
+
+        forward = _packet(PUBLISH, 0, len(topic.encode('utf-8')).to_bytes(2, 'big') + topic.encode('utf-8') + payload)
+        for topic_filter, subscriber in self._subscriptions:
+            if topic_matches(topic_filter, topic):
+                subscriber.write(forward)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Minimal local MQTT broker for offline tests")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=1883, help="TCP port")
+    args = parser.parse_args()
+
+    broker = LocalMQTTBroker(args.host, args.port)
+    print(f"MQTT broker stand-in listening on {args.host}:{broker.start()}")
+    seen = 0
+    try:
+        while True:
+            time.sleep(1)
+            for message in broker.messages[seen:]:
+                print(f"{message.topic} (QoS {message.qos}): {message.payload.decode('utf-8', 'replace')}")
+            seen = len(broker.messages)
+    except KeyboardInterrupt:
+        broker.stop()
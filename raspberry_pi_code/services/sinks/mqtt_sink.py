@@ -0,0 +1,120 @@
+# raspberry_pi_code/services/sinks/mqtt_sink.py
+#
+# Publishes readings over one long-lived MQTT connection. Compared to an
+# HTTPS request per reading this costs a few dozen bytes per message and no
+# handshake. Needs the optional paho-mqtt package.
+
+import json
+import threading
+from urllib.parse import urlencode
+from typing import Dict, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+from BUZZWatch.raspberry_pi_code.services.api.thingspeak import FIELD_MAP, format_created_at
+from BUZZWatch.raspberry_pi_code.services.sinks.base import Sink
+
+THINGSPEAK_MQTT_HOST = "mqtt3.thingspeak.com"
+THINGSPEAK_MQTT_TOPIC = "channels/{channel_id}/publish"
+
+
+class MQTTSink(Sink):
+    """
+    Publishes readings to an MQTT broker.
+
+    payload_format 'json' publishes {"hive", "created_at", <fields>} to the
+    topic template (formatted with hive and channel_id). 'thingspeak'
+    publishes ThingSpeak's field1=...&field5=... form, for use with
+    THINGSPEAK_MQTT_HOST and THINGSPEAK_MQTT_TOPIC and the channel's MQTT
+    device credentials. The connection is opened once and re-established
+    by the client's network thread when it drops.
+    """
+
+    name = 'mqtt'
+
+    def __init__(self, host: str = "localhost", port: int = 1883,
+                 topic: str = "buzzwatch/{hive}", qos: int = 1,
+                 payload_format: str = 'json',
+                 client_id: str = "", username: Optional[str] = None,
+                 password: Optional[str] = None, keepalive: int = 60,
+                 publish_timeout: float = 10.0,
+                 channel_ids: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            host: Broker host name
+            port: Broker port
+            topic: Topic template, formatted with hive and channel_id
+            qos: MQTT quality of service (0, 1 or 2)
+            payload_format: 'json' or 'thingspeak'
+            client_id: MQTT client ID (ThingSpeak: the MQTT device's client ID)
+            username: Optional user name
+            password: Optional password
+            keepalive: Seconds between keep-alive pings
+            publish_timeout: Seconds to wait for the broker to acknowledge a QoS 1/2 message
+            channel_ids: ThingSpeak channel ID per hive, for the {channel_id} topic placeholder
+        """
+        if payload_format not in ('json', 'thingspeak'):
+            raise ValueError(f"Unknown MQTT payload format: {payload_format}")
+        try:
+            import paho.mqtt.client as mqtt
+        except ImportError:
+            raise ImportError("The MQTT sink needs paho-mqtt (pip install paho-mqtt)")
+
+        self.host = host
+        self.port = port
+        self.topic = topic
+        self.qos = qos
+        self.payload_format = payload_format
+        self.publish_timeout = publish_timeout
+        self.channel_ids = channel_ids or {}
+        self._connected = threading.Event()
+
+        try:
+            # paho-mqtt 2.x
+            self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        except AttributeError:
+            self._client = mqtt.Client(client_id=client_id)
+        if username:
+            self._client.username_pw_set(username, password)
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.reconnect_delay_set(min_delay=1, max_delay=120)
+        self._client.connect_async(host, port, keepalive)
+        self._client.loop_start()
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties=None):
+        if reason_code == 0:
+            self._connected.set()
+        else:
+            log_error_to_file("ERR_MQTT_CONNECT", f"{self.host}:{self.port} refused the connection: {reason_code}")
+
+    def _on_disconnect(self, client, userdata, *args):
+        self._connected.clear()
+
+    def wait_connected(self, timeout: float = 10.0) -> bool:
+        """Wait until the connection to the broker is up."""
+        return self._connected.wait(timeout)
+
+    def _payload(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> str:
+        if self.payload_format == 'thingspeak':
+            values = {FIELD_MAP[name]: value for name, value in fields.items() if value is not None}
+            return urlencode(values)
+        message = {'hive': hive, 'created_at': format_created_at(created_at)}
+        message.update(fields)
+        return json.dumps(message, separators=(',', ':'))
+
+    def send(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> bool:
+        topic = self.topic.format(hive=hive, channel_id=self.channel_ids.get(hive, ''))
+        try:
+            info = self._client.publish(topic, self._payload(hive, created_at, fields), qos=self.qos)
+            if self.qos > 0:
+                info.wait_for_publish(timeout=self.publish_timeout)
+            if info.rc != 0 or not info.is_published():
+                log_error_to_file("ERR_MQTT_PUBLISH", f"{topic}: not acknowledged (rc {info.rc})")
+                return False
+            return True
+        except Exception as e:
+            log_error_to_file("ERR_MQTT_PUBLISH", f"{topic}: {str(e)}")
+            return False
+
+    def close(self):
+        self._client.disconnect()
+        self._client.loop_stop()
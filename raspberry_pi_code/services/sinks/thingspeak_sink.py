@@ -0,0 +1,21 @@
+# raspberry_pi_code/services/sinks/thingspeak_sink.py
+
+from typing import Dict, Optional
+from BUZZWatch.raspberry_pi_code.services.api.thingspeak import ThingSpeakAPI
+from BUZZWatch.raspberry_pi_code.services.sinks.base import Sink
+
+
+class ThingSpeakSink(Sink):
+    """Sends readings to each hive's ThingSpeak channel over HTTP."""
+
+    name = 'thingspeak'
+
+    def __init__(self, apis: Dict[str, ThingSpeakAPI]):
+        """
+        Args:
+            apis: ThingSpeak client per hive
+        """
+        self.apis = apis
+
+    def send(self, hive: str, created_at: float, fields: Dict[str, Optional[float]]) -> bool:
+        return self.apis[hive].upload_data(created_at=created_at, **fields)
@@ -0,0 +1,312 @@
+# raspberry_pi_code/services/upload_queue.py
+#
+# Store-and-forward for uploads: every reading is written to a small SQLite
+# database before it is sent, and a background thread sends what is queued
+# whenever the network is available. Readings survive reboots and outages.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional
+from BUZZWatch.raspberry_pi_code.errors import log_error_to_file
+
+UPLOAD_QUEUE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'upload_queue.db')
+
+# id: queue position, channel: hive name, created_at: acquisition time (time.time()),
+# fields: upload_data() keyword arguments, attempts: sends the service rejected so far
+QueuedReading = namedtuple('QueuedReading', ['id', 'channel', 'created_at', 'fields', 'attempts'])
+
+# send: callable(list of QueuedReading) -> bool, batch_size: readings per send,
+# hold: seconds the oldest reading may wait so that a batch can fill up
+UploadTarget = namedtuple('UploadTarget', ['send', 'batch_size', 'hold'])
+
+# Rejected sends after which a reading is moved to the dead letters
+UPLOAD_MAX_ATTEMPTS = 5
+
+
+class UploadRejected(Exception):
+    """
+    Raised by an UploadTarget's send when the service answered but did not
+    accept the readings (as opposed to returning False when it could not be
+    reached), e.g. ThingSpeak's "0" answer or an HTTP 4xx status.
+    """
+
+
+class UploadQueue:
+    """
+    Durable FIFO of readings waiting for upload, kept in SQLite.
+
+    The database runs in WAL mode with synchronous=NORMAL: an insert is one
+    small append to the write-ahead log and the SD card is only synced at
+    checkpoints, while a power loss can at most lose the last few readings,
+    never corrupt the queue. The queue holds at most max_rows readings; when
+    it is full the oldest ones are dropped. Readings the service keeps
+    rejecting are moved to a separate dead_letters table, where they can be
+    inspected without blocking the readings behind them.
+    """
+
+    def __init__(self, path: str = UPLOAD_QUEUE_FILE, max_rows: int = 50000):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            max_rows: Maximum queued readings (50000 = about a month at one reading per minute)
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA journal_size_limit=1048576")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS readings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                fields TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS readings_channel ON readings (channel, id)")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                id INTEGER PRIMARY KEY,
+                channel TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                fields TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                failed_at REAL NOT NULL
+            )
+        """)
+        self._count = self._db.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def put(self, channel: str, created_at: float, fields: Dict[str, Optional[float]]) -> int:
+        """
+        Queue one reading.
+
+        Args:
+            channel: Hive name the reading belongs to
+            created_at: Acquisition time (time.time())
+            fields: upload_data() keyword arguments, e.g. {'weight': 42.5}
+
+        Returns:
+            The queue id of the reading
+        """
+        payload = json.dumps(fields, separators=(',', ':'))
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO readings (channel, created_at, fields) VALUES (?, ?, ?)",
+                (channel, created_at, payload))
+            self._count += 1
+            if self._count > self.max_rows:
+                excess = self._count - self.max_rows
+                self._db.execute(
+                    "DELETE FROM readings WHERE id IN (SELECT id FROM readings ORDER BY id LIMIT ?)",
+                    (excess,))
+                self._count -= excess
+                log_error_to_file("ERR_UPLOAD_QUEUE_FULL",
+                                  f"Upload queue full ({self.max_rows} readings), dropped the oldest")
+            return cursor.lastrowid
+
+    def peek(self, limit: int = 100, channel: Optional[str] = None) -> List[QueuedReading]:
+        """Oldest queued readings (of one channel if given), without removing them."""
+        with self._lock:
+            if channel is None:
+                rows = self._db.execute(
+                    "SELECT id, channel, created_at, fields, attempts FROM readings "
+                    "ORDER BY id LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT id, channel, created_at, fields, attempts FROM readings "
+                    "WHERE channel = ? ORDER BY id LIMIT ?", (channel, limit)).fetchall()
+        return [QueuedReading(row[0], row[1], row[2], json.loads(row[3]), row[4]) for row in rows]
+
+    def remove(self, ids: List[int]):
+        """Delete readings that were uploaded."""
+        if not ids:
+            return
+        with self._lock:
+            cursor = self._db.executemany("DELETE FROM readings WHERE id = ?", [(i,) for i in ids])
+            self._count -= cursor.rowcount
+
+    def mark_failed(self, ids: List[int]):
+        """Count a rejected send for the readings."""
+        if not ids:
+            return
+        with self._lock:
+            self._db.executemany("UPDATE readings SET attempts = attempts + 1 WHERE id = ?",
+                                 [(i,) for i in ids])
+
+    def dead_letter(self, ids: List[int]):
+        """Move readings that cannot be uploaded out of the queue into dead_letters."""
+        if not ids:
+            return
+        marks = ", ".join("?" * len(ids))
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO dead_letters (id, channel, created_at, fields, attempts, failed_at) "
+                    f"SELECT id, channel, created_at, fields, attempts, ? FROM readings WHERE id IN ({marks})",
+                    [time.time()] + list(ids))
+                cursor = self._db.execute(f"DELETE FROM readings WHERE id IN ({marks})", list(ids))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._count -= cursor.rowcount
+
+    def dead_letter_count(self) -> int:
+        """Readings in the dead_letters table."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class UploadDrainer:
+    """
+    Background thread that sends queued readings, oldest first.
+
+    Each channel has an UploadTarget. A send takes up to batch_size readings
+    (one request for a bulk-capable channel). With a hold time a channel is
+    only sent once its oldest reading is hold seconds old or a full batch is
+    waiting, so several readings go out in one request. Sends to one channel
+    are no closer than min_interval seconds apart. A failed send
+    means the channel (or the network) is down: that channel is retried
+    after a delay that doubles up to max_backoff seconds, while the other
+    channels are still sent. A send the service rejects (UploadRejected) is
+    retried the same way, but after max_attempts rejections the readings are
+    moved to the dead letters so they cannot block the channel. wake() starts
+    a pass immediately, e.g. after a new reading was queued.
+    """
+
+    def __init__(self, upload_queue: UploadQueue,
+                 targets: Dict[str, UploadTarget],
+                 min_interval: float = 15.0, retry_interval: float = 30.0,
+                 max_backoff: float = 900.0, max_attempts: int = UPLOAD_MAX_ATTEMPTS):
+        """
+        Args:
+            upload_queue: Queue to drain
+            targets: UploadTarget per channel; send returns True if the readings were accepted
+            min_interval: Minimum seconds between two sends to the same channel
+            retry_interval: First delay in seconds after a failed send
+            max_backoff: Longest delay in seconds between retries
+            max_attempts: Rejected sends after which readings are dead-lettered
+        """
+        self.queue = upload_queue
+        self.targets = targets
+        self.min_interval = min_interval
+        self.retry_interval = retry_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+
+        self.sent = 0
+        self.dead_lettered = 0
+        self.failures: Dict[str, int] = {}   # Failed sends in a row per channel
+        self._next_send: Dict[str, float] = {}
+        self._delay = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the thread; readings left from a previous run are sent right away."""
+        self._wake.set()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="upload-drainer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the thread. By default this waits for a send in progress, so the
+        queue can be closed safely afterwards.
+
+        Returns:
+            True if the thread has ended
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        return True
+
+    def wake(self):
+        """Run a pass now (channels backing off after a failure are left out)."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self._delay if self._delay > 0 else None)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self._delay = self.drain()
+            except Exception as e:
+                log_error_to_file("ERR_UPLOAD_DRAIN", str(e))
+                self._delay = self.retry_interval
+
+    def drain(self) -> float:
+        """
+        Send what may be sent now.
+
+        Returns:
+            Seconds until the next pass is due (0 if nothing is waiting)
+        """
+        waits = []
+        for channel, target in self.targets.items():
+            while not self._stop.is_set():
+                wait = self._next_send.get(channel, 0.0) - time.monotonic()
+                if wait > 0:
+                    waits.append(wait)
+                    break
+                readings = self.queue.peek(target.batch_size, channel=channel)
+                if not readings:
+                    break
+                age = time.time() - readings[0].created_at
+                if age < target.hold and len(readings) < target.batch_size:
+                    waits.append(target.hold - age)
+                    break
+
+                ids = [reading.id for reading in readings]
+                try:
+                    success = target.send(readings)
+                except UploadRejected as e:
+                    self.queue.mark_failed(ids)
+                    dead = [reading.id for reading in readings if reading.attempts + 1 >= self.max_attempts]
+                    if dead:
+                        self.queue.dead_letter(dead)
+                        self.dead_lettered += len(dead)
+                        log_error_to_file("ERR_UPLOAD_DEAD_LETTER",
+                                          f"{channel}: {len(dead)} readings rejected {self.max_attempts} times, "
+                                          f"moved to the dead letters ({str(e)})")
+                        self.failures.pop(channel, None)
+                        self._next_send[channel] = time.monotonic() + self.min_interval
+                        continue
+                    success = False
+                if not success:
+                    failures = self.failures[channel] = self.failures.get(channel, 0) + 1
+                    delay = min(self.max_backoff, self.retry_interval * 2 ** (failures - 1))
+                    self._next_send[channel] = time.monotonic() + delay
+                    waits.append(delay)
+                    break
+
+                self.queue.remove(ids)
+                self.sent += len(readings)
+                self.failures.pop(channel, None)
+                self._next_send[channel] = time.monotonic() + self.min_interval
+        return min(waits) if waits else 0.0
@@ -10,6 +10,8 @@ Usage:
   python test_hx711.py --test        - Test the scale with existing calibration
   python test_hx711.py --measure     - Take multiple measurements and show statistics
   python test_hx711.py --info        - Show current calibration values
+  python test_hx711.py --multipoint  - Calibrate with several reference weights
+  python test_hx711.py --capture     - Record every raw sample to the sample archive
 """
 
 import time
@@ -23,9 +25,21 @@ from BUZZWatch.raspberry_pi_code.hardware_layer.sensors import (
     REFERENCE_UNIT, 
     ZERO_OFFSET,
     calibrate_hx711, 
+    calibrate_hx711_multipoint,
     is_calibrated, 
+    read_raw_samples,
     cleanup,
-    CALIBRATION_FILE
+    CALIBRATION_FILE,
+    registry,
+    get_hive
+)
+from BUZZWatch.raspberry_pi_code.hardware_layer.calibration import (
+    load_calibration,
+    CalibrationModel
+)
+from BUZZWatch.raspberry_pi_code.hardware_layer.sample_archive import (
+    SampleArchive,
+    SAMPLE_DTYPE
 )
 
 def print_header(title=None):
@@ -80,9 +94,9 @@ def take_measurements(count=20, delay=0.5, show_raw=True):
             # Get raw reading if requested
             if show_raw:
                 try:
-                    readings = hx.get_raw_data(times=3)
-                    if readings:
-                        raw_avg = sum(readings) / len(readings)
+                    readings = read_raw_samples(3)
+                    if len(readings):
+                        raw_avg = float(readings.mean())
                         raw_values.append(raw_avg)
                 except Exception as e:
                     pass
@@ -516,6 +530,39 @@ def run_calibration_wizard():
     
     return True
 
+def run_multipoint_calibration():
+    """
+    Interactive multi-point calibration.
+    Fits a linear or quadratic model over several reference weights,
+    which corrects load cell non-linearity across the full hive range.
+    """
+    print_header("HX711 MULTI-POINT CALIBRATION")
+    
+    if not hx:
+        print("ERROR: HX711 sensor not initialized! Check your connections.")
+        return False
+    
+    print("Enter the reference weights you will use, in grams, separated by commas.")
+    print("Include 0 for the empty scale (board only), e.g.: 0, 5000, 20000, 50000")
+    try:
+        weights = [float(w) for w in input("Reference weights: ").split(",") if w.strip()]
+    except ValueError:
+        print("Invalid weight list.")
+        return False
+    
+    degree = 2 if input("Fit a quadratic model to correct non-linearity? (y/n): ").strip().lower() == 'y' else 1
+    if len(weights) < degree + 1:
+        print(f"A degree {degree} model needs at least {degree + 1} reference weights.")
+        return False
+    
+    def wait_for_weight(weight):
+        input(f"Place {weight:g}g on the scale and press Enter when stable...")
+    
+    success, message = calibrate_hx711_multipoint(weights, degree=degree, wait_for_weight=wait_for_weight)
+    print_separator()
+    print(message)
+    return success
+
 def run_measurements():
     """Run a comprehensive measurement session and display detailed statistics"""
     print_header("HX711 COMPREHENSIVE MEASUREMENTS")
@@ -545,6 +592,42 @@ def run_measurements():
         print("Failed to collect measurements.")
         return False
 
+def run_capture():
+    """
+    Record raw samples continuously into the sample archive until Ctrl+C.
+    The daily files can be opened with numpy.memmap(path, dtype=SAMPLE_DTYPE).
+    """
+    print_header("HX711 RAW SAMPLE CAPTURE")
+    
+    hive = get_hive()
+    sampler = registry.get(hive['devices']['hx711_sampler'])
+    if sampler is None:
+        print("ERROR: HX711 sensor not initialized! Check your connections.")
+        return False
+    
+    if sampler.archive is None:
+        sampler.archive = SampleArchive(hive['name'])
+    print(f"Writing to {sampler.archive.directory} ({SAMPLE_DTYPE.itemsize} bytes per sample)")
+    print("Press Ctrl+C to stop.")
+    print_separator()
+    
+    start_time = time.time()
+    start_count = sampler.sample_count
+    try:
+        while True:
+            time.sleep(5)
+            elapsed = time.time() - start_time
+            samples = sampler.sample_count - start_count
+            latest = sampler.latest(1)
+            print(f"  {elapsed:7.0f}s  |  {samples} samples ({samples / elapsed:.1f}/s)  |  "
+                  f"raw {int(latest[0]) if len(latest) else 'N/A'}")
+    except KeyboardInterrupt:
+        print("\nCapture stopped by user.")
+    
+    sampler.archive.flush()
+    print(f"Samples archived: {sampler.archive.written}")
+    return True
+
 def test_scale():
     """
     Test the scale with existing calibration.
@@ -556,11 +639,21 @@ def test_scale():
         print("ERROR: HX711 sensor not initialized! Check your connections.")
         return False
     
-    # Check if calibrated
+    # Check if calibrated; the saved model (multi-point or single-point) converts the raw values
+    model = None
     if is_calibrated():
-        print(f"Using calibration values:")
-        print(f"  Reference Unit: {REFERENCE_UNIT}")
-        print(f"  Zero Offset: {ZERO_OFFSET}")
+        calibration = load_calibration(CALIBRATION_FILE)
+        model = CalibrationModel.from_calibration(calibration)
+        fit = calibration.get('model')
+        if fit and fit.get('coefficients'):
+            print(f"Using multi-point calibration model:")
+            print(f"  Degree: {fit.get('degree', len(fit['coefficients']) - 1)}")
+            if 'rmse' in fit:
+                print(f"  RMSE: {fit['rmse']:.2f} g")
+        else:
+            print(f"Using calibration values:")
+            print(f"  Reference Unit: {calibration['reference_unit']}")
+            print(f"  Zero Offset: {calibration['zero_offset']}")
     else:
         print("WARNING: Scale is not calibrated. Raw values will be shown.")
         print("For accurate weight measurements, run the calibration wizard first.")
@@ -583,13 +676,12 @@ def test_scale():
             calc_weight = "N/A"
             try:
                 if hx:
-                    readings = hx.get_raw_data(times=3)
-                    if readings:
-                        raw_value = sum(readings) / len(readings)
+                    readings = read_raw_samples(3)
+                    if len(readings):
+                        raw_value = float(readings.mean())
                         # Calculate weight from raw value
-                        if is_calibrated() and REFERENCE_UNIT != 0:
-                            calc_weight = (raw_value - ZERO_OFFSET) / REFERENCE_UNIT
-                            calc_weight = f"{calc_weight:.2f}"
+                        if model is not None:
+                            calc_weight = f"{model(raw_value):.2f}"
             except:
                 pass
                 
@@ -638,6 +730,11 @@ def show_info():
                     if 'sensitivity' in data:
                         print(f"  Sensitivity: {data['sensitivity']:.2f} counts per unit")
                     
+                    if 'model' in data:
+                        model = data['model']
+                        print(f"  Model: degree {model['degree']} polynomial over {len(model['residuals'])} points")
+                        print(f"  RMS residual: {model['rmse']:.2f}")
+                    
                     if 'empty_raw' in data and 'weight_raw' in data:
                         print(f"  Empty raw reading: {data['empty_raw']:.2f}")
                         print(f"  Reference weight raw reading: {data['weight_raw']:.2f}")
@@ -669,9 +766,13 @@ if __name__ == "__main__":
                 run_measurements()
             elif sys.argv[1] == "--info":
                 show_info()
+            elif sys.argv[1] == "--multipoint":
+                run_multipoint_calibration()
+            elif sys.argv[1] == "--capture":
+                run_capture()
             else:
                 print(f"Unknown argument: {sys.argv[1]}")
-                print("Available options: --test, --measure, --info")
+                print("Available options: --test, --measure, --info, --multipoint, --capture")
         else:
             # By default, run the calibration wizard
             run_calibration_wizard()
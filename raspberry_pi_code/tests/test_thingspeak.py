@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 
+import sys
 from BUZZWatch.raspberry_pi_code.config import THINGSPEAK_API_KEY
-from BUZZWatch.raspberry_pi_code.services.api.thingspeak import ThingSpeakAPI
+from BUZZWatch.raspberry_pi_code.services.api.thingspeak import ThingSpeakAPI, THINGSPEAK_SERVER
 
-def test_thingspeak():
+def test_thingspeak(server=THINGSPEAK_SERVER):
     print("\nTesting ThingSpeak Connection:")
     print("-" * 30)
     
     # Initialize ThingSpeak API with key from config
-    api = ThingSpeakAPI(THINGSPEAK_API_KEY)
+    api = ThingSpeakAPI(THINGSPEAK_API_KEY, server=server)
     
     # Test connection
     return api.test_connection()
 
 if __name__ == "__main__":
     try:
-        success = test_thingspeak()
+        if "--mock" in sys.argv:
+            # Local mock server instead of api.thingspeak.com (no network needed)
+            from BUZZWatch.raspberry_pi_code.services.api.mock_server import MockThingSpeakServer
+            mock = MockThingSpeakServer()
+            success = test_thingspeak(mock.start())
+            mock.stop()
+        else:
+            success = test_thingspeak()
         if success:
             print("\nThingSpeak connection test passed!")
             exit(0)